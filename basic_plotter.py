@@ -1,111 +1,145 @@
-import os
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import datetime
 import sys
 
-NUM_REPS = 3
-
-def generate_wash_bar_plot(file_path, col_name, y_label, row_names):
-    # Column name for fluorescence values
-    value_col = f"{col_name}"
+from export import export_figure, output_paths
+from flowjo_io import load_flowjo_table
+from instrumentation import figure, stage
+from light_dark_plotter import _channel
+from plate_data import PlateData
+from plate_layout import join_layout
 
-    df = pd.read_csv(file_path)
+NUM_REPS = 3
 
+def _prepare_wash_bar(df, row_names, layout=None):
     df = df.rename(columns={df.columns[0]: 'Well'})
     
     df = df[~df['Well'].isin(['Mean', 'SD'])]
-    
-    df["index"] = range(len(df))
-    df["group"] = df["index"] // 3
+
+    if layout is not None:
+        # Constructs from the plate layout instead of every-3-rows
+        df = join_layout(df, layout)
+        df["group"] = df["construct"].cat.codes
+        row_names = list(df["construct"].cat.categories)
+    else:
+        df["index"] = range(len(df))
+        df["group"] = df["index"] // 3
     df["Well"] = [row_names[g] for g in df["group"]]
-    
-    result = df.groupby("group", as_index=False)[col_name].agg(['mean', 'std'])
-    
-    result["Well"] = [row_names[g] for g in result['group']]
-    
-    pd.set_option('display.max_columns', None)
-    
-    print(result)    
-
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.sans-serif": ["Arial"],  
-        "font.size": 10,                   
-        "axes.labelsize": 12,
-        "axes.titlesize": 12,
-        "xtick.labelsize": 10,
-        "ytick.labelsize": 10,
+    return df, row_names
+
+
+def _wash_plate(df, col_names, row_names):
+    # One condition; constructs are the groups, coded by group number
+    groups = df["group"].to_numpy()
+    return PlateData(df["Well"].to_numpy(), col_names, df[list(col_names)].to_numpy(),
+                     np.zeros(len(df), dtype=np.intp), groups, [None], row_names[:groups.max() + 1])
+
+
+def summarize_wash_bar(file_path, col_names, row_names, layout=None):
+    # Tidy mean/std/n per construct for every column, without touching matplotlib
+    df, row_names = _prepare_wash_bar(load_flowjo_table(file_path, columns=col_names), row_names, layout)
+    plate = _wash_plate(df, col_names, row_names)
+    mean, std, n = plate.group_stats()
+    _, group = plate.groups()
+    k = len(plate.columns)
+    return pd.DataFrame({
+        "column": np.repeat(np.asarray(plate.columns, dtype=object), len(group)),
+        "group": np.tile(group, k),
+        "Well": np.tile(np.asarray(plate.constructs, dtype=object)[group], k),
+        "mean": mean.T.ravel(),
+        "std": std.T.ravel(),
+        "n": n.T.ravel(),
     })
 
-    # Positions and bar width
-    x = np.arange(len(result["Well"]))
-    width = 0.35
-
-    # Create figure
-    fig, ax = plt.subplots(figsize=(8, 5))
-
-    bars1 = ax.bar(
-        x - width/2, result["mean"],
-        yerr=[result["std"]],
-        width=width,
-        color="#d86ecc", edgecolor="black",
-        alpha=0.6, capsize=5, linewidth=0.5, 
-        error_kw=dict(elinewidth=0.8, capthick=0.8)
-    )
-
-    # Overlay individual data points
-    jitter = 0.07   # horizontal spread for visibility
-    dot_size = 25   # point size
-    dot_alpha = 1 # transparency
-
-    for i, well in enumerate(result["Well"]):
-
-        vals = df.loc[df["Well"] == well, value_col].values
-
-        ax.scatter(
-            np.repeat(i - width/2, len(vals)) +
-            np.random.uniform(-jitter, jitter, len(vals)),
-            vals,
-            color="#d86ecc", s=dot_size, alpha=dot_alpha, zorder=1
-        )
-
-    ax.set_xticks(x)
-    ax.set_xticklabels(result["Well"], fontsize=12)
-    ax.set_xlabel("Construct", fontsize=13, labelpad=10)
-    ax.set_ylabel(f"{y_label} Fluorescence Intensity (a.u.)", fontsize=13, labelpad=10)
-    # ax.set_title(f"Difference in {col_name} Fluorescence Intensity by Wash", fontsize=15, pad=15)
-
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.tick_params(axis="both", which="major", labelsize=11)
-
-    # Add subtle horizontal gridlines
-    ax.yaxis.grid(True, linestyle="-", linewidth=0.8, alpha=0.4)
-    ax.set_axisbelow(True)
-
-    plt.tight_layout()
-    plt.show()
-    
-    date = datetime.date.today()
 
-    os.makedirs(f"plots/pdf/{date}", exist_ok=True)
-    os.makedirs(f"plots/svg/{date}", exist_ok=True)
-    
-    fig.savefig(
-        f"plots/pdf/{date}/16-10-wash-results-{y_label}-{filter}.pdf",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
-    
-    fig.savefig(
-        f"plots/svg/{date}/16-10-wash-results-{y_label}-{filter}.svg",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
+def generate_wash_bar_plot(file_path, col_name, y_label, row_names, show=True, layout=None, formats=None):
+    import matplotlib.pyplot as plt
+
+    with figure(f"wash-bar-{y_label}-{col_name}"):
+        # Column name for fluorescence values
+        value_col = f"{col_name}"
+
+        with stage("load"):
+            df = load_flowjo_table(file_path, columns=[value_col], compact=True)
+        with stage("summarize"):
+            df, row_names = _prepare_wash_bar(df, row_names, layout)
+            plate = _wash_plate(df, [value_col], row_names)
+
+            mean, std, _ = plate.group_stats()
+            _, group = plate.groups()
+            result = pd.DataFrame({"group": group, "mean": mean[:, 0], "std": std[:, 0]})
+
+            result["Well"] = [row_names[g] for g in result['group']]
+
+            pd.set_option('display.max_columns', None)
+
+            print(result)    
+
+        with stage("draw"):
+            plt.rcParams.update({
+                "font.family": "sans-serif",
+                "font.sans-serif": ["Arial"],  
+                "font.size": 10,                   
+                "axes.labelsize": 12,
+                "axes.titlesize": 12,
+                "xtick.labelsize": 10,
+                "ytick.labelsize": 10,
+            })
+
+            # Positions and bar width
+            x = np.arange(len(result["Well"]))
+            width = 0.35
+
+            # Create figure
+            fig, ax = plt.subplots(figsize=(8, 5))
+
+            bars1 = ax.bar(
+                x - width/2, result["mean"],
+                yerr=[result["std"]],
+                width=width,
+                color="#d86ecc", edgecolor="black",
+                alpha=0.6, capsize=5, linewidth=0.5, 
+                error_kw=dict(elinewidth=0.8, capthick=0.8)
+            )
+
+            # Overlay individual data points
+            jitter = 0.07   # horizontal spread for visibility
+            dot_size = 25   # point size
+            dot_alpha = 1 # transparency
+
+            # Every replicate in one scatter, at its construct's bar
+            pos = np.searchsorted(group, plate.construct)
+            ax.scatter(
+                pos - width/2 + np.random.uniform(-jitter, jitter, len(plate)),
+                plate.column(value_col),
+                color="#d86ecc", s=dot_size, alpha=dot_alpha, zorder=1
+            )
+
+            ax.set_xticks(x)
+            ax.set_xticklabels(result["Well"], fontsize=12)
+            ax.set_xlabel("Construct", fontsize=13, labelpad=10)
+            ax.set_ylabel(f"{y_label} Fluorescence Intensity (a.u.)", fontsize=13, labelpad=10)
+            # ax.set_title(f"Difference in {col_name} Fluorescence Intensity by Wash", fontsize=15, pad=15)
+
+            ax.spines["top"].set_visible(False)
+            ax.spines["right"].set_visible(False)
+            ax.tick_params(axis="both", which="major", labelsize=11)
+
+            # Add subtle horizontal gridlines
+            ax.yaxis.grid(True, linestyle="-", linewidth=0.8, alpha=0.4)
+            ax.set_axisbelow(True)
+
+        with stage("layout"):
+            plt.tight_layout()
+        if show:
+            plt.show()
+
+        # One file per column, named by channel like the light/dark plots
+        channel = _channel(col_name) if "::" in col_name else col_name.replace("/", "_")
+        export_figure(fig, output_paths(f"16-10-wash-results-{y_label}-{channel}", formats))
+
+        if not show:
+            plt.close(fig)
 
 
 
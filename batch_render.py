@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+import basic_plotter
+import build_manifest
+import export
+import instrumentation
+import light_dark_plotter
+from flowjo_io import load_flowjo_table
+
+
+def _init_worker(trace=False, profile="default"):
+    # Non-interactive backend: nothing ever opens a window in the workers,
+    # and they save with the parent's output profile
+    matplotlib.use("Agg", force=True)
+    export.set_profile(profile)
+    if trace:
+        instrumentation.enable_tracing()
+
+
+# A job is (func, args, kwargs, build); build is (outputs, manifest key) or None
+
+# Position of the statistic column in each plotting function's args, so the
+# cache warm-up parses only the columns the jobs will read
+_COLUMN_ARG = {
+    light_dark_plotter.generate_light_dark_plot: 2,
+    basic_plotter.generate_wash_bar_plot: 1,
+}
+def _run_job(job):
+    func, args, kwargs, _ = job
+    func(*args, show=False, **kwargs)
+
+    # Hand this job's stage timings back to the parent
+    recs = instrumentation.records()
+    if instrumentation.tracing_enabled():
+        instrumentation.enable_tracing()
+    return recs
+
+
+def light_dark_jobs(file_path, savefile, column_names, y_label, row_names, light_dark, incremental=False, layout=None, formats=None):
+    jobs = []
+    manifest = build_manifest.load_manifest() if incremental else None
+    for col_name in column_names:
+        build = None
+        if incremental:
+            outputs = light_dark_plotter.light_dark_outputs(savefile, col_name, y_label, formats)
+            key = light_dark_plotter.light_dark_key(file_path, savefile, col_name, y_label, row_names, light_dark, layout)
+            if build_manifest.is_current(outputs, key, manifest):
+                continue
+            build = (outputs, key)
+        jobs.append((light_dark_plotter.generate_light_dark_plot, (file_path, savefile, col_name, y_label, row_names, light_dark), {"layout": layout, "formats": formats}, build))
+    return jobs
+
+
+def wash_bar_jobs(file_path, column_names, y_label, row_names, formats=None):
+    return [
+        (basic_plotter.generate_wash_bar_plot, (file_path, col_name, y_label, row_names), {"formats": formats}, None)
+        for col_name in column_names
+    ]
+
+
+def run_batch(jobs, max_workers=None, trace=None):
+    # One worker per core by default; each (file, column) job renders headless.
+    # trace: .json/.csv path for per-stage wall/CPU/peak-RSS records of every figure
+    max_workers = max_workers or os.cpu_count()
+    if trace:
+        instrumentation.enable_tracing()
+
+    # Parse every table once up front (just the jobs' columns) so workers all
+    # hit the sidecar cache; None = a job that may read any column
+    tables = {}
+    for func, args, kwargs, _ in jobs:
+        if args and isinstance(args[0], str) and args[0].endswith(".csv"):
+            columns = tables.setdefault(args[0], set())
+            if columns is not None and func in _COLUMN_ARG:
+                columns.add(args[_COLUMN_ARG[func]])
+            else:
+                tables[args[0]] = None
+    for path, columns in tables.items():
+        load_flowjo_table(path, columns=None if columns is None else sorted(columns))
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(bool(trace), export.current_profile())) as pool:
+        futures = {pool.submit(_run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            func, args, _, build = futures[future]
+            try:
+                instrumentation.extend_records(future.result())
+            except Exception as e:
+                failed.append((futures[future], e))
+                print(f"FAILED {func.__name__}{args[:3]}: {e}")
+                continue
+            # Only the parent writes the manifest, so workers never race on it
+            if build is not None:
+                build_manifest.record(*build)
+
+    print(f"Rendered {len(jobs) - len(failed)}/{len(jobs)} figures with {max_workers} workers.")
+    if trace:
+        instrumentation.write_trace(trace)
+        instrumentation.print_summary()
+        instrumentation.disable_tracing()
+    return failed
+
+
+if __name__ == "__main__":
+    row_names = ["ICR58_0", "ICR186_0", "ICR187_0", "ICR186+190_0", "ICR187+190_0",
+                 "ICR58_10", "ICR186_10", "ICR187_10", "ICR186+190_10", "ICR187+190_10"]
+
+    column_names = ["cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL1-A :: 355nm405-30-A)"]
+
+    light_dark = {
+        "01": {"condition": "Light", "color": "#d86ecc"},
+        "02": {"condition": "Dark", "color": "#bfbfbf"},
+    }
+
+    jobs = []
+    for file, savefile in [("data/06-Nov-2025 FlowJo table.csv", "06-11-25")]:
+        jobs += light_dark_jobs(file, savefile, column_names, "Geometric Mean", row_names, light_dark, incremental=True)
+
+    run_batch(jobs)
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import string
+import sys
+import tempfile
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+import basic_plotter
+import benchmarking_check
+import flowjo_io
+import instrumentation
+import light_dark_plotter
+import washes_comparison
+from plate_layout import light_dark_layout
+
+# Plate sizes -> (rows, columns)
+PLATE_SHAPES = {24: (4, 6), 96: (8, 12), 384: (16, 24), 1536: (32, 48)}
+
+DRONPA_COL = 'cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL9-A :: 488nm525-40-A)'
+WASH_COL = "cells/Single Cells | Geometric Mean (FL2-H :: 355nm450-45-H)"
+
+RENDER_STAGES = ["draw", "layout", "bbox", "save_pdf", "save_svg", "save_png", "write"]
+
+
+def _row_labels(n_rows):
+    # A..Z, then AA, AB, ... for 1536-well plates
+    letters = string.ascii_uppercase
+    return [letters[i] if i < 26 else letters[i // 26 - 1] + letters[i % 26] for i in range(n_rows)]
+
+
+def stat_columns(n_stats):
+    return [
+        f"cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL{i}-A :: CH{i}-A)"
+        for i in range(1, n_stats + 1)
+    ]
+
+
+def synthetic_flowjo_table(n_wells=96, n_stats=10, prefixes=("01", "02"), seed=0):
+    # FlowJo-style export: blank-named Well column, one column per statistic,
+    # trailing Mean/SD rows. Wells are split evenly across the prefixes
+    # ("01-A1.fcs", ... "02-A1.fcs"); an empty prefix gives plain "A1.fcs".
+    if n_wells not in PLATE_SHAPES:
+        raise ValueError(f"n_wells must be one of {sorted(PLATE_SHAPES)}")
+    n_rows, n_cols = PLATE_SHAPES[n_wells]
+    positions = [f"{r}{c}" for r in _row_labels(n_rows) for c in range(1, n_cols + 1)]
+
+    per_prefix = n_wells // len(prefixes)
+    wells = [
+        f"{prefix}-{pos}.fcs" if prefix else f"{pos}.fcs"
+        for i, prefix in enumerate(prefixes)
+        for pos in positions[i * per_prefix:(i + 1) * per_prefix]
+    ]
+
+    rng = np.random.default_rng(seed)
+    columns = stat_columns(n_stats) + [DRONPA_COL, WASH_COL]
+    values = rng.lognormal(mean=7, sigma=0.4, size=(len(wells), len(columns)))
+
+    table = pd.DataFrame(values, columns=columns)
+    table.insert(0, "", wells)
+    footer = pd.DataFrame([["Mean", *values.mean(axis=0)], ["SD", *values.std(axis=0, ddof=1)]], columns=table.columns)
+    return pd.concat([table, footer], ignore_index=True)
+
+
+def write_synthetic_table(path, n_wells=96, n_stats=10, prefixes=("01", "02"), seed=0):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    synthetic_flowjo_table(n_wells, n_stats, prefixes, seed).to_csv(path, index=False)
+    return path
+
+
+def _cold(path):
+    # Drop the in-process and on-disk table cache so every run measures a real parse
+    flowjo_io.clear_cache(path)
+    shutil.rmtree(os.path.join(os.path.dirname(os.path.abspath(path)), flowjo_io.CACHE_DIR), ignore_errors=True)
+
+
+def synthetic_layout(n_wells, n_reps=3):
+    # One layout covering every plotter on a plain (unprefixed) plate: each row
+    # pair is one construct at 0 / 10 mM, columns in blocks of n_reps are washes,
+    # top half of the plate is Light and bottom half Dark
+    n_rows, n_cols = PLATE_SHAPES[n_wells]
+    r, c = np.divmod(np.arange(n_wells), n_cols)
+    return pd.DataFrame({
+        "Well": [f"{row}{col + 1}" for row, col in zip(np.array(_row_labels(n_rows))[r], c)],
+        "condition": np.where(r < n_rows // 2, "Light", "Dark"),
+        "construct": [f"K{i}" for i in r // 2],
+        "replicate": c % n_reps,
+        "npn_mM": np.where(r % 2 == 0, 0, 10),
+        "washes": c // n_reps,
+    })
+
+
+def _scenarios(workdir, n_wells, n_reps, n_stats, n_columns):
+    # (name, table path, callable) for each plotter on a plate of n_wells
+    ld_path = write_synthetic_table(os.path.join(workdir, f"ld-{n_wells}.csv"), n_wells, n_stats)
+    plain_path = write_synthetic_table(os.path.join(workdir, f"plain-{n_wells}.csv"), n_wells, n_stats, prefixes=("",))
+    columns = stat_columns(n_stats)[:n_columns]
+
+    light_dark = {
+        "01": {"condition": "Light", "color": "#d86ecc"},
+        "02": {"condition": "Dark", "color": "#bfbfbf"},
+    }
+    row_names = [f"C{i}" for i in range(-(-n_wells // 2 // n_reps))]
+    ld_layout = light_dark_layout(pd.read_csv(ld_path, usecols=[0]).iloc[:, 0], row_names, light_dark, n_reps)
+
+    layout = synthetic_layout(n_wells, n_reps)
+
+    return [
+        ("light_dark_plotter", ld_path, lambda: light_dark_plotter.generate_light_dark_plots(
+            ld_path, "bench", columns, "Geometric Mean", row_names, light_dark, show=False, layout=ld_layout)),
+        ("basic_plotter", plain_path, lambda: [
+            basic_plotter.generate_wash_bar_plot(plain_path, col, "Geometric Mean", [], show=False, layout=layout)
+            for col in columns]),
+        ("washes_comparison", plain_path, lambda: washes_comparison.generate_wash_bar_plot(
+            "Geometric Mean", show=False, file_path=plain_path, layout=layout)),
+        ("benchmarking_check", plain_path, lambda: benchmarking_check.generate_benchmarking_linreg(
+            plain_path, "bench", columns, show=False, fast=True, layout=layout)),
+    ]
+
+
+def run_benchmarks(sizes=(24, 96, 384), n_reps=3, n_stats=10, n_columns=2, repeat=3):
+    matplotlib.use("Agg", force=True)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Plotters write to ./plots, keep that out of the repo
+        os.chdir(workdir)
+        try:
+            for n_wells in sizes:
+                for name, path, run in _scenarios(workdir, n_wells, n_reps, n_stats, n_columns):
+                    # Untimed warm-up: first-call imports and font caches aren't the plotter's cost
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run()
+                    best = None
+                    for _ in range(repeat):
+                        _cold(path)
+                        instrumentation.enable_tracing()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            run()
+                        recs = pd.DataFrame(instrumentation.records())
+                        instrumentation.disable_tracing()
+
+                        per_stage = recs.groupby("stage")["wall_s"].sum()
+                        timing = {
+                            "load_s": per_stage.get("load", 0.0),
+                            "summarize_s": per_stage.get("summarize", 0.0),
+                            "render_s": per_stage.reindex(RENDER_STAGES).fillna(0).sum(),
+                            # per-stage peaks where the platform has them, else the process mark
+                            "peak_rss_mb": recs["peak_rss_mb"].fillna(recs["process_peak_rss_mb"]).max(),
+                        }
+                        timing["total_s"] = timing["load_s"] + timing["summarize_s"] + timing["render_s"]
+                        if best is None or timing["total_s"] < best["total_s"]:
+                            best = timing
+                    results.append({"plotter": name, "n_wells": n_wells, **best,
+                                    "wells_per_s": n_wells / best["total_s"]})
+                    print(f"{name:>20} {n_wells:>5} wells  {best['total_s']:.3f}s", file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+    return pd.DataFrame(results)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    # ratio > 1 + tolerance on total time = regression
+    base = pd.DataFrame(baseline)[["plotter", "n_wells", "total_s"]].rename(columns={"total_s": "baseline_s"})
+    merged = results.merge(base, on=["plotter", "n_wells"], how="left")
+    merged["ratio"] = merged["total_s"] / merged["baseline_s"]
+    merged["status"] = np.where(merged["baseline_s"].isna(), "new",
+                                np.where(merged["ratio"] > 1 + tolerance, "REGRESSION", "ok"))
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load/summarize/render benchmarks on synthetic FlowJo tables.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[24, 96, 384], choices=sorted(PLATE_SHAPES))
+    parser.add_argument("--reps", type=int, default=3, help="replicates per construct")
+    parser.add_argument("--stats", type=int, default=10, help="statistic columns in each table")
+    parser.add_argument("--columns", type=int, default=2, help="columns each plotter renders")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, best one is kept")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.reps, args.stats, args.columns, args.repeat)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results.to_dict(orient="records"), f, indent=1)
+        print(results.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(results.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"No baseline at {args.baseline}; rerun with --save-baseline to store one.")
+        return 0
+
+    with open(args.baseline) as f:
+        report = compare_to_baseline(results, json.load(f), args.tolerance)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    return 1 if (report["status"] == "REGRESSION").any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
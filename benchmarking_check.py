@@ -1,95 +1,215 @@
-import datetime
-import os
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from scipy.stats import linregress
 import numpy as np
 
-def generate_benchmarking_linreg(input_file, output_file, npn_cols):
-    df = pd.read_csv(input_file)
+from export import export_figure, output_paths
+from flowjo_io import load_flowjo_table
+from instrumentation import batch, batch_label, figure, stage
+from plate_layout import join_layout
 
-    df = df[:-2]
+CONDITION_ORDER = ["Light-0mM", "Light-10mM", "Dark-0mM", "Dark-10mM"]
+
+
+def batch_linregress(x, y):
+    # Closed-form OLS over the last axis; x and y broadcast, so one call
+    # covers every (npn_col × condition) pair, or every bootstrap resample
+    from scipy.stats import t as student_t
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x, y = np.broadcast_arrays(x, y)
+    n = x.shape[-1]
+
+    x_mean = x.mean(axis=-1)
+    y_mean = y.mean(axis=-1)
+    dx = x - x_mean[..., None]
+    dy = y - y_mean[..., None]
+    sxx = (dx * dx).sum(axis=-1)
+    sxy = (dx * dy).sum(axis=-1)
+    syy = (dy * dy).sum(axis=-1)
+
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+    r = sxy / np.sqrt(sxx * syy)
+
+    dof = n - 2
+    resid_sd = np.sqrt(np.maximum(syy - slope * sxy, 0) / dof)
+    stderr = resid_sd / np.sqrt(sxx)
+    p = 2 * student_t.sf(np.abs(slope / stderr), dof)
+
+    return {
+        "slope": slope, "intercept": intercept, "r": r, "p": p, "stderr": stderr,
+        "n": n, "x_mean": x_mean, "sxx": sxx, "resid_sd": resid_sd,
+    }
+
+
+def confidence_band(fit, x_grid, level=0.95):
+    # Analytic CI of the fitted line: t * s * sqrt(1/n + (x - x̄)² / Sxx)
+    from scipy.stats import t as student_t
+
+    y_hat = fit["intercept"] + fit["slope"] * x_grid
+    t_crit = student_t.ppf(0.5 + level / 2, fit["n"] - 2)
+    half = t_crit * fit["resid_sd"] * np.sqrt(1 / fit["n"] + (x_grid - fit["x_mean"]) ** 2 / fit["sxx"])
+    return y_hat, y_hat - half, y_hat + half
+
+
+def bootstrap_band(x, y, x_grid, n_boot=1000, seed=0, level=0.95):
+    # All resamples at once: (n_boot, n) index matrix -> (n_boot,) fits -> (n_boot, grid) lines
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(n_boot, len(x)))
+    fits = batch_linregress(np.asarray(x)[idx], np.asarray(y)[idx])
+    lines = fits["intercept"][:, None] + fits["slope"][:, None] * x_grid
+    tail = (1 - level) / 2 * 100
+    return np.nanpercentile(lines, [tail, 100 - tail], axis=0)
+
+
+def _fast_curves(x, y, fit, n_boot=None, seed=0):
+    # Fitted line + band on a 100-point grid over the observed x range
+    x_grid = np.linspace(x.min(), x.max(), 100)
+    y_hat, lo, hi = confidence_band(fit, x_grid)
+    if n_boot:
+        lo, hi = bootstrap_band(x, y, x_grid, n_boot=n_boot, seed=seed)
+    return x_grid, y_hat, lo, hi
+
+
+def _fit_label(fit):
+    return f"Slope = {fit['slope']:.3f}\nIntercept = {fit['intercept']:.1f}\n$R^2$ = {fit['r']**2:.3f}\n$p$ = {fit['p']:.3f}"
+
+
+def _update_linreg(axes, artists, x_all, y_all, fits, j, n_boot=None, seed=0):
+    # Template mode: same 2×2 grid and x data, swap in npn column j's points,
+    # line, band and stats text, then rescale the shared y-axis by hand
+    y_min, y_max = np.inf, -np.inf
+    for k, (points, line, band, text) in enumerate(artists):
+        fit = {key: (val[j] if np.ndim(val) else val) for key, val in fits[k].items()}
+        x, y = x_all[k], y_all[k][j]
+        x_grid, y_hat, lo, hi = _fast_curves(x, y, fit, n_boot, seed)
+
+        points.set_offsets(np.column_stack([x, y]))
+        line.set_ydata(y_hat)
+        band.set_verts([np.column_stack([np.r_[x_grid, x_grid[::-1]], np.r_[lo, hi[::-1]]])])
+        text.set_text(_fit_label(fit))
+        y_min = np.nanmin([y_min, y.min(), lo.min()])
+        y_max = np.nanmax([y_max, y.max(), hi.max()])
+
+    pad = 0.05 * (y_max - y_min or 1)
+    axes[0].set_ylim(y_min - pad, y_max + pad)
+
+
+def generate_benchmarking_linreg(input_file, output_file, npn_cols, show=True, fast=False, n_boot=None, seed=0, layout=None, formats=None, template=False):
+    # fast=True: closed-form fits drawn directly (analytic band, or a vectorized
+    # seeded bootstrap band when n_boot is given) instead of sns.regplot.
+    # template=True (fast mode only): build the 2×2 grid once and update its
+    # artists in place for each npn column
+    # Plotting libraries load lazily (seaborn only for the regplot path)
+    import matplotlib.pyplot as plt
 
     # Define column names
     dronpa_col = 'cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL9-A :: 488nm525-40-A)'
-    
-    # sns.set_theme(style="whitegrid", context="talk")
-
-    for npn_col in npn_cols:
-
-        # Create condition labels based on row number
-        conditions = (["Light-0mM"] * 15 +
-                    ["Light-10mM"] * 15 +
-                    ["Dark-0mM"] * 15 +
-                    ["Dark-10mM"] * 15)
-
-        df["Condition"] = conditions
-        df["Light/Dark"] = df["Condition"].str.split("-").str[0]
-        df["NPN_mM"] = df["Condition"].str.split("-").str[1]
-
-        # Set up 2×2 grid
-        fig, axes = plt.subplots(2, 2, figsize=(12, 10), sharex=True, sharey=True)
-
-        # Flatten axes for easy iteration
-        axes = axes.flatten()
-
-        # Define order
-        condition_order = ["Light-0mM", "Light-10mM", "Dark-0mM", "Dark-10mM"]
-
-        # Loop through each condition
-        for ax, cond in zip(axes, condition_order):
-            subset = df[df["Condition"] == cond]
-
-            # Scatter + regression line
-            sns.regplot(
-                x=dronpa_col, y=npn_col, data=subset,
-                scatter_kws={"s": 40, "alpha": 0.7, "edgecolor": "k", "linewidths": 0.3},
-                line_kws={"color": "#0072B2", "lw": 2},
-                ax=ax
-            )
-
-            # Linear regression stats
-            slope, intercept, r_value, p_value, std_err = linregress(subset[dronpa_col], subset[npn_col])
-
-            # Annotate
-            ax.text(
-                0.05, 0.95,
-                f"Slope = {slope:.3f}\nIntercept = {intercept:.1f}\n$R^2$ = {r_value**2:.3f}\n$p$ = {p_value:.3f}",
-                transform=ax.transAxes, fontsize=9, verticalalignment="top",
-                bbox=dict(facecolor="white", alpha=0.7, edgecolor="none")
-            )
-
-            ax.set_title(cond.replace("-", ", "))
-            ax.set_xlabel("Dronpa fluorescence (a.u.)")
-            ax.set_ylabel("NPN fluorescence (a.u.)")
-            ax.spines[['top','right']].set_visible(False)
-
-        plt.tight_layout()
-        plt.show()
-        
-        date = datetime.date.today()
-        
-        
-        os.makedirs(f"plots/pdf/{date}", exist_ok=True)
-        os.makedirs(f"plots/svg/{date}", exist_ok=True)
-        
-        channel = npn_col.split("::")[1].strip().split(" ")[0].split(")")[0]
-        
-        fig.savefig(
-            f"plots/pdf/{date}/{output_file}-light-dark-{channel}.pdf",
-            bbox_inches="tight",   # trims white space
-            dpi=300,               # for raster elements (still vector overall)
-            transparent=True       # if you want transparent background
-        )
-        
-        fig.savefig(
-            f"plots/svg/{date}/{output_file}-light-dark-{channel}.svg",
-            bbox_inches="tight",   # trims white space
-            dpi=300,               # for raster elements (still vector overall)
-            transparent=True       # if you want transparent background
-        )
-    
+
+    # Load + fits are shared by every npn column's figure
+    with batch(batch_label([f"{output_file}-linreg-{c}" for c in npn_cols])):
+        with stage("load"):
+            df = load_flowjo_table(input_file, columns=[dronpa_col, *npn_cols], compact=True)
+
+        with stage("summarize"):
+            df = df[:-2]
+
+            # sns.set_theme(style="whitegrid", context="talk")
+
+            if layout is not None:
+                # Light/Dark + NPN concentration per well from the plate layout
+                df = join_layout(df.rename(columns={df.columns[0]: "Well"}), layout)
+                df["Condition"] = [f"{cond}-{npn:g}mM" for cond, npn in zip(df["condition"], df["npn_mM"])]
+            else:
+                # Create condition labels based on row number
+                conditions = (["Light-0mM"] * 15 +
+                            ["Light-10mM"] * 15 +
+                            ["Dark-0mM"] * 15 +
+                            ["Dark-10mM"] * 15)
+
+                df["Condition"] = conditions
+            df["Light/Dark"] = df["Condition"].str.split("-").str[0]
+            df["NPN_mM"] = df["Condition"].str.split("-").str[1]
+
+            # Every (npn_col × condition) regression in one batched pass
+            # (one call per condition, so replicate counts may differ between conditions)
+            cond_rows = [np.flatnonzero(df["Condition"].to_numpy() == cond) for cond in CONDITION_ORDER]
+            x_all = [df[dronpa_col].to_numpy(np.float64)[rows] for rows in cond_rows]
+            y_all = [df[list(npn_cols)].to_numpy(np.float64)[rows].T for rows in cond_rows]
+            fits = [batch_linregress(x, y) for x, y in zip(x_all, y_all)]
+
+    template = template and fast
+    artists = None
+    for j, npn_col in enumerate(npn_cols):
+
+        with figure(f"{output_file}-linreg-{npn_col}"):
+            with stage("draw"):
+                if artists is not None:
+                    _update_linreg(axes, artists, x_all, y_all, fits, j, n_boot, seed)
+                else:
+                    # Set up 2×2 grid
+                    fig, axes = plt.subplots(2, 2, figsize=(12, 10), sharex=True, sharey=True)
+
+                    # Flatten axes for easy iteration
+                    axes = axes.flatten()
+                    drawn = []
+
+                    # Loop through each condition
+                    for k, (ax, cond) in enumerate(zip(axes, CONDITION_ORDER)):
+                        fit = {key: (val[j] if np.ndim(val) else val) for key, val in fits[k].items()}
+
+                        if fast:
+                            x, y = x_all[k], y_all[k][j]
+                            x_grid, y_hat, lo, hi = _fast_curves(x, y, fit, n_boot, seed)
+
+                            points = ax.scatter(x, y, s=40, alpha=0.7, edgecolor="k", linewidths=0.3, color="C0")
+                            line, = ax.plot(x_grid, y_hat, color="#0072B2", lw=2)
+                            band = ax.fill_between(x_grid, lo, hi, color="#0072B2", alpha=0.15, linewidth=0)
+                        else:
+                            import seaborn as sns
+
+                            subset = df[df["Condition"] == cond]
+
+                            # Scatter + regression line
+                            sns.regplot(
+                                x=dronpa_col, y=npn_col, data=subset,
+                                scatter_kws={"s": 40, "alpha": 0.7, "edgecolor": "k", "linewidths": 0.3},
+                                line_kws={"color": "#0072B2", "lw": 2},
+                                seed=seed,
+                                ax=ax
+                            )
+
+                        # Linear regression stats (from the batched fit)
+                        text = ax.text(
+                            0.05, 0.95,
+                            _fit_label(fit),
+                            transform=ax.transAxes, fontsize=9, verticalalignment="top",
+                            bbox=dict(facecolor="white", alpha=0.7, edgecolor="none")
+                        )
+                        if fast:
+                            drawn.append((points, line, band, text))
+
+                        ax.set_title(cond.replace("-", ", "))
+                        ax.set_xlabel("Dronpa fluorescence (a.u.)")
+                        ax.set_ylabel("NPN fluorescence (a.u.)")
+                        ax.spines[['top','right']].set_visible(False)
+
+            if artists is None:
+                with stage("layout"):
+                    fig.tight_layout()
+            if template and artists is None:
+                artists = drawn
+            if show:
+                plt.show()
+
+            channel = npn_col.split("::")[1].strip().split(" ")[0].split(")")[0]
+            export_figure(fig, output_paths(f"{output_file}-light-dark-{channel}", formats))
+
+            if not show and not template:
+                plt.close(fig)
+
+    if template and not show:
+        plt.close(fig)
+
 if __name__ == "__main__":
     
     npn_cols = ['cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL2-A :: 355nm450-45-A)', 'cells/Single Cells/488nm525-40-A subset | Geometric Mean (FL1-A :: 355nm405-30-A)']
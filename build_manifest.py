@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+MANIFEST_PATH = "plots/.manifest.json"
+
+# abs path -> (mtime_ns, size, sha1) so a 200-figure report hashes each CSV once
+_digests = {}
+
+
+def file_digest(file_path):
+    abs_path = os.path.abspath(file_path)
+    st = os.stat(abs_path)
+    hit = _digests.get(abs_path)
+    if hit is not None and hit[:2] == (st.st_mtime_ns, st.st_size):
+        return hit[2]
+
+    h = hashlib.sha1()
+    with open(abs_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    _digests[abs_path] = (st.st_mtime_ns, st.st_size, h.hexdigest())
+    return h.hexdigest()
+
+
+def inputs_key(file_paths, **params):
+    # Content hash of the input files (data + plotting code) and every render parameter
+    payload = {
+        "files": [file_digest(p) for p in file_paths],
+        "params": params,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(outputs, key, manifest=None):
+    if manifest is None:
+        manifest = load_manifest()
+    return all(manifest.get(out) == key and os.path.exists(out) for out in outputs)
+
+
+def record(outputs, key, path=MANIFEST_PATH):
+    manifest = load_manifest(path)
+    for out in outputs:
+        manifest[out] = key
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import build_manifest
+from basic_plotter import _prepare_wash_bar
+from flowjo_io import load_flowjo_table
+from light_dark_plotter import _channel, _prepare_light_dark
+
+# store/date=YYYY-MM-DD/<experiment>.<kind>.parquet, one long-format file per ingested
+# table, plus store/index.json: per file, which constructs / conditions / channels it
+# holds, so a query opens only the files that can match (no CSV is ever re-parsed)
+STORE_DIR = "store"
+INDEX_NAME = "index.json"
+
+COLUMNS = ["date", "experiment", "kind", "well", "construct", "condition", "replicate",
+           "column", "gate", "statistic", "channel", "value"]
+
+
+def _schema():
+    # One schema for every file: label columns as dictionaries with a fixed int32
+    # index, whatever the plate size (pandas picks int8 codes for a 24-well plate
+    # and int16 for 384, which a multi-file dataset can't reconcile)
+    import pyarrow as pa
+
+    label = pa.dictionary(pa.int32(), pa.string())
+    types = {"replicate": pa.int16(), "value": pa.float64()}
+    return pa.schema([(name, types.get(name, label)) for name in COLUMNS])
+
+
+def experiment_date(file_path):
+    # "06-Nov-2025 FlowJo table.csv" -> "2025-11-06", else the file's modification date
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    try:
+        return datetime.datetime.strptime(stem.split(" ")[0], "%d-%b-%Y").date().isoformat()
+    except ValueError:
+        return datetime.date.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+
+
+def _stat_parts(col_name):
+    # "cells/Single Cells | Geometric Mean (FL2-H :: 355nm450-45-H)"
+    #   -> ("cells/Single Cells", "Geometric Mean", "355nm450-45-H")
+    gate, _, rest = col_name.rpartition(" | ")
+    channel = _channel(col_name) if "::" in col_name else ""
+    return gate, rest.split(" (")[0], channel
+
+
+def load_index(store=STORE_DIR):
+    try:
+        with open(os.path.join(store, INDEX_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index, store):
+    path = os.path.join(store, INDEX_NAME)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _long_frame(wells, construct, condition, replicate, values, col_names, date, experiment, kind):
+    # (wells × columns) -> one row per (well, column); sorted so each file's row
+    # groups carry tight construct/condition/channel min-max statistics
+    n, k = values.shape
+    parts = [_stat_parts(c) for c in col_names]
+    long = pd.DataFrame({
+        "date": date,
+        "experiment": experiment,
+        "kind": kind,
+        "well": np.tile(wells, k),
+        "construct": np.tile(construct, k),
+        "condition": np.tile(condition, k),
+        "replicate": np.tile(replicate, k).astype(np.int16),
+        "column": np.repeat(col_names, n),
+        "gate": np.repeat([p[0] for p in parts], n),
+        "statistic": np.repeat([p[1] for p in parts], n),
+        "channel": np.repeat([p[2] for p in parts], n),
+        "value": values.T.reshape(-1).astype(np.float64),
+    })
+    long = long.sort_values(["construct", "condition", "channel", "well"], kind="stable", ignore_index=True)
+    for col in long.columns.drop(["replicate", "value"]):
+        long[col] = long[col].astype("category")
+    return long
+
+
+def _write(long, rel, key, date, experiment, kind, store):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out = os.path.join(store, rel)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+
+    # Re-ingesting the same table replaces its file in place
+    tmp = f"{out}.tmp{os.getpid()}"
+    pq.write_table(pa.Table.from_pandas(long, schema=_schema(), preserve_index=False), tmp,
+                   compression="zstd", row_group_size=1 << 16)
+    os.replace(tmp, out)
+
+    index = load_index(store)
+    index[rel] = {
+        "key": key,
+        "date": date,
+        "experiment": experiment,
+        "kind": kind,
+        "rows": len(long),
+        "constructs": sorted(map(str, long["construct"].cat.categories)),
+        "conditions": sorted(map(str, long["condition"].cat.categories)),
+        "channels": sorted(map(str, long["channel"].cat.categories)),
+    }
+    _save_index(index, store)
+    return out
+
+
+def _ingest(file_path, kind, key, date, store, build):
+    date = date or experiment_date(file_path)
+    experiment = os.path.splitext(os.path.basename(file_path))[0]
+    rel = os.path.join(f"date={date}", f"{experiment}.{kind}.parquet")
+    entry = load_index(store).get(rel)
+    if entry is not None and entry["key"] == key and os.path.exists(os.path.join(store, rel)):
+        print(f"{os.path.basename(file_path)} ({kind}) already in the store.")
+        return os.path.join(store, rel)
+    return _write(build(date, experiment), rel, key, date, experiment, kind, store)
+
+
+def ingest_light_dark(file_path, row_names, light_dark, column_names=None, layout=None, date=None, store=STORE_DIR):
+    # Per-well values with the construct / Light-Dark condition the light_dark plotter assigns
+    df = load_flowjo_table(file_path, columns=column_names)
+    column_names = list(column_names or df.columns[1:])
+    key = build_manifest.inputs_key([file_path], kind="light-dark", row_names=list(row_names), light_dark=light_dark,
+                                    column_names=column_names, layout=layout if isinstance(layout, str) else None)
+
+    def build(date, experiment):
+        d = _prepare_light_dark(df, row_names, light_dark, layout)
+        replicate = d["replicate"] if "replicate" in d else d.groupby(["prefix2", "group"], observed=True).cumcount()
+        return _long_frame(
+            d["Well"].astype(str).to_numpy(), d["WellLabel"].astype(str).to_numpy(), d["condition"].astype(str).to_numpy(),
+            replicate.to_numpy(), d[column_names].to_numpy(np.float64), column_names, date, experiment, "light-dark",
+        )
+
+    return _ingest(file_path, "light-dark", key, date, store, build)
+
+
+def ingest_wash(file_path, row_names, column_names=None, layout=None, date=None, store=STORE_DIR):
+    # Per-well values with the construct the wash-bar plotter's grouping assigns
+    df = load_flowjo_table(file_path, columns=column_names)
+    column_names = list(column_names or df.columns[1:])
+    key = build_manifest.inputs_key([file_path], kind="wash", row_names=list(row_names),
+                                    column_names=column_names, layout=layout if isinstance(layout, str) else None)
+
+    def build(date, experiment):
+        wells = df.iloc[:, 0]
+        d, _ = _prepare_wash_bar(df, row_names, layout)
+        condition = d["condition"].astype(str).to_numpy() if "condition" in d else np.full(len(d), "")
+        replicate = d["replicate"] if "replicate" in d else d.groupby("group").cumcount()
+        return _long_frame(
+            wells.loc[d.index].astype(str).to_numpy(), d["Well"].astype(str).to_numpy(), condition,
+            replicate.to_numpy(), d[column_names].to_numpy(np.float64), column_names, date, experiment, "wash",
+        )
+
+    return _ingest(file_path, "wash", key, date, store, build)
+
+
+def _wanted(values):
+    return None if values is None else {values} if isinstance(values, str) else set(values)
+
+
+def query(constructs=None, conditions=None, channels=None, start=None, end=None,
+          statistic=None, kind=None, store=STORE_DIR):
+    # Per-well rows across experiments; every argument narrows the result.
+    # start/end: ISO dates, inclusive. The index picks the files, row-group
+    # statistics + the filter do the rest inside each file.
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    constructs, conditions, channels = _wanted(constructs), _wanted(conditions), _wanted(channels)
+    files = [
+        os.path.join(store, rel) for rel, e in sorted(load_index(store).items())
+        if (start is None or e["date"] >= start) and (end is None or e["date"] <= end)
+        and (kind is None or e["kind"] == kind)
+        and (constructs is None or constructs & set(e["constructs"]))
+        and (conditions is None or conditions & set(e["conditions"]))
+        and (channels is None or channels & set(e["channels"]))
+    ]
+    if not files:
+        return pd.DataFrame(columns=COLUMNS)
+
+    expr = None
+    for field, wanted in (("construct", constructs), ("condition", conditions), ("channel", channels),
+                          ("statistic", _wanted(statistic))):
+        if wanted is not None:
+            cond = pc.field(field).isin(sorted(wanted))
+            expr = cond if expr is None else expr & cond
+
+    table = ds.dataset(files, schema=_schema(), format="parquet").to_table(filter=expr)
+    return table.to_pandas()
+
+
+def summarize_across(by=("construct", "condition", "channel", "date"), **filters):
+    # mean / std / n of the per-well values for each group across experiments
+    rows = query(**filters)
+    by = list(by)
+    return (
+        rows.groupby(by, observed=True, sort=True)["value"]
+            .agg(mean="mean", std="std", n="count")
+            .reset_index()
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-experiment store of per-well FlowJo values.")
+    parser.add_argument("--store", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="add FlowJo tables to the store")
+    ingest.add_argument("config", help="JSON run config with row_names, light_dark and optionally column_names / layout")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("-k", "--kind", choices=["light-dark", "wash"], default="light-dark")
+
+    q = sub.add_parser("query", help="summary across experiments")
+    q.add_argument("--construct", nargs="+")
+    q.add_argument("--condition", nargs="+")
+    q.add_argument("--channel", nargs="+")
+    q.add_argument("--statistic")
+    q.add_argument("--start")
+    q.add_argument("--end")
+    q.add_argument("--by", nargs="+", default=["construct", "condition", "channel", "date"])
+    q.add_argument("-o", "--out", help="output .csv/.parquet/.json (prints to stdout if omitted)")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        with open(args.config) as f:
+            config = json.load(f)
+        for file_path in args.files:
+            if args.kind == "light-dark":
+                ingest_light_dark(file_path, config["row_names"], config["light_dark"],
+                                  config.get("column_names"), config.get("layout"), store=args.store)
+            else:
+                ingest_wash(file_path, config["row_names"], config.get("column_names"), config.get("layout"), store=args.store)
+        return
+
+    summary = summarize_across(
+        args.by, constructs=args.construct, conditions=args.condition, channels=args.channel,
+        statistic=args.statistic, start=args.start, end=args.end, store=args.store,
+    )
+    if args.out:
+        from summarize import write_summary
+        write_summary(summary, args.out)
+    else:
+        print(summary.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
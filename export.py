@@ -0,0 +1,143 @@
+import datetime
+import gzip
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import stage
+
+FORMATS = ("pdf", "svg", "png", "svgz")
+
+# What every plotter writes unless a run asks for something else (e.g. ["png"] for quick looks)
+DEFAULT_FORMATS = ("pdf", "svg")
+
+DPI = 300            # for raster elements (still vector overall)
+TRANSPARENT = True   # transparent background
+PAD_INCHES = 0.1     # same padding bbox_inches="tight" adds
+
+# Output profiles. "default" keeps every artist a vector path, as always.
+# "compact" is for the shared report folder: SVG goes out gzipped (5-8x
+# smaller), SVG text stays text instead of glyph outlines, PDF fonts are
+# embedded as subset TrueType, scatter layers with at least RASTER_MIN_POINTS
+# markers become one image at the profile dpi (bars, axes and text stay
+# vector), and every written file's size is printed.
+PROFILES = {
+    "default": {"formats": DEFAULT_FORMATS, "dpi": DPI, "rasterize": False, "rc": {}, "report_sizes": False},
+    "compact": {
+        "formats": ("pdf", "svgz"),
+        "dpi": 150,
+        "rasterize": True,
+        "rc": {"pdf.fonttype": 42, "pdf.compression": 9, "svg.fonttype": "none"},
+        "report_sizes": True,
+    },
+}
+# Vector markers share one path definition, so a scatter only gets smaller as an
+# image past a few thousand points (a 1536-well plate's dots are cheaper as vectors;
+# pooled multi-plate scatters are not)
+RASTER_MIN_POINTS = 5000
+
+_profile = "default"
+
+
+def set_profile(name):
+    global _profile
+    if name not in PROFILES:
+        raise ValueError(f"Unknown output profile {name!r}; choose from {list(PROFILES)}")
+    _profile = name
+
+
+def current_profile():
+    return _profile
+
+
+def profile_settings():
+    return PROFILES[_profile]
+
+
+def profile_rc():
+    # rcParams the active profile needs while a figure is saved
+    import matplotlib
+
+    return matplotlib.rc_context(profile_settings()["rc"])
+
+
+def rasterize_dense(fig):
+    # Rasterize dense marker layers only
+    if not profile_settings()["rasterize"]:
+        return
+    from matplotlib.collections import PathCollection
+
+    for ax in fig.axes:
+        for coll in ax.collections:
+            if isinstance(coll, PathCollection) and len(coll.get_offsets()) >= RASTER_MIN_POINTS:
+                coll.set_rasterized(True)
+
+
+def resolve_formats(formats=None):
+    if formats is None:
+        return profile_settings()["formats"]
+    formats = (formats,) if isinstance(formats, str) else tuple(formats)
+    if not formats:
+        raise ValueError(f"No export formats given; choose from {FORMATS} (None = the profile's)")
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s) {unknown}; choose from {FORMATS}")
+    return formats
+
+
+def output_paths(name, formats=None, subdir=None):
+    # plots/<fmt>/<subdir>/<name>.<fmt>; subdir defaults to today's date, "" for none
+    if subdir is None:
+        subdir = str(datetime.date.today())
+    return [os.path.join("plots", fmt, subdir, f"{name}.{fmt}") for fmt in resolve_formats(formats)]
+
+
+def _write(path, data, compress=False):
+    if compress:
+        data = gzip.compress(data, mtime=0)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def report_sizes(paths):
+    for path in paths:
+        print(f"{path}: {os.path.getsize(path) / 1024:.1f} kB")
+
+
+def export_figure(fig, paths):
+    # Write one figure to every path (format from the extension). The tight
+    # bounding box is measured once instead of by a throwaway render inside each
+    # savefig, SVG is rendered once for both .svg and .svgz, and compression +
+    # disk writes run on a thread pool while the next format renders.
+    # Rendering itself stays serial: savefig mutates the figure while it draws.
+    paths = list(paths)
+    settings = profile_settings()
+    by_format = {}
+    for path in paths:
+        by_format.setdefault(os.path.splitext(path)[1][1:].lower(), []).append(path)
+    resolve_formats(by_format)
+
+    rasterize_dense(fig)
+    with stage("bbox"):
+        bbox = fig.get_tightbbox().padded(PAD_INCHES)
+
+    rendered, writes = {}, []
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool, profile_rc():
+        for fmt in sorted(by_format, key=lambda f: f == "svgz"):
+            render_fmt = "svg" if fmt == "svgz" else fmt
+            if render_fmt not in rendered:
+                with stage(f"save_{render_fmt}"):
+                    buf = io.BytesIO()
+                    fig.savefig(buf, format=render_fmt, bbox_inches=bbox, dpi=settings["dpi"], transparent=TRANSPARENT)
+                    rendered[render_fmt] = buf.getvalue()
+            for path in by_format[fmt]:
+                writes.append(pool.submit(_write, path, rendered[render_fmt], fmt == "svgz"))
+        with stage("write"):
+            for w in writes:
+                w.result()
+    if settings["report_sizes"]:
+        report_sizes(paths)
+    return paths
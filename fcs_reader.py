@@ -0,0 +1,156 @@
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+STATS = ("Geometric Mean", "Median", "Mean", "CV")
+
+
+def _parse_text(raw):
+    # Keyword/value pairs separated by the first byte; a doubled delimiter is an escaped one
+    text = raw.decode("utf-8", errors="replace")
+    delim = text[0]
+    parts = text[1:].replace(delim * 2, "\0").split(delim)
+    parts = [p.replace("\0", delim) for p in parts]
+    if len(parts) % 2:
+        parts = parts[:-1]
+    return {k.upper(): v.strip() for k, v in zip(parts[0::2], parts[1::2])}
+
+
+def read_fcs_metadata(file_path):
+    with open(file_path, "rb") as f:
+        header = f.read(58)
+        version = header[:6].decode("ascii", errors="replace")
+        if version not in ("FCS3.0", "FCS3.1"):
+            raise ValueError(f"{file_path}: unsupported FCS version {version!r}")
+
+        offsets = [int(header[i:i + 8].strip() or 0) for i in range(10, 58, 8)]
+        text_start, text_end, data_start, data_end = offsets[:4]
+
+        f.seek(text_start)
+        meta = _parse_text(f.read(text_end - text_start + 1))
+
+    # Files over 100 MB put the DATA offsets in TEXT and zeros in the header
+    if data_start == 0 and data_end == 0:
+        data_start = int(meta["$BEGINDATA"])
+        data_end = int(meta["$ENDDATA"])
+
+    meta["_DATA_START"] = data_start
+    meta["_DATA_END"] = data_end
+    return meta
+
+
+def _event_dtype(meta):
+    n_par = int(meta["$PAR"])
+    order = meta.get("$BYTEORD", "1,2,3,4").replace(" ", "")
+    endian = "<" if order.startswith("1") else ">"
+    datatype = meta["$DATATYPE"].upper()
+    bits = {int(meta[f"$P{i}B"]) for i in range(1, n_par + 1)}
+
+    if meta.get("$MODE", "L").upper() != "L":
+        raise ValueError("Only list-mode ($MODE=L) FCS files are supported.")
+    if datatype == "F":
+        return np.dtype(f"{endian}f4")
+    if datatype == "D":
+        return np.dtype(f"{endian}f8")
+    if datatype == "I" and len(bits) == 1 and bits <= {8, 16, 32, 64}:
+        return np.dtype(f"{endian}u{bits.pop() // 8}")
+    raise ValueError(f"Unsupported $DATATYPE={datatype} with bit widths {sorted(bits)}.")
+
+
+def read_fcs_events(file_path, meta=None):
+    # Memory-map the DATA segment as an (events × channels) array, no copy
+    if meta is None:
+        meta = read_fcs_metadata(file_path)
+    n_par = int(meta["$PAR"])
+    n_events = int(meta["$TOT"])
+    return np.memmap(
+        file_path, dtype=_event_dtype(meta), mode="r",
+        offset=meta["_DATA_START"], shape=(n_events, n_par),
+    )
+
+
+def channel_names(meta):
+    # FlowJo-style "(FL1-A :: 355nm405-30-A)" labels from $PnN / $PnS
+    names = []
+    for i in range(1, int(meta["$PAR"]) + 1):
+        pnn = meta[f"$P{i}N"]
+        pns = meta.get(f"$P{i}S") or pnn
+        names.append(f"({pnn} :: {pns})")
+    return names
+
+
+def _channel_stats(values, meta, i):
+    x = np.asarray(values, dtype=np.float64)
+
+    # Integer data: keep only the bits covered by $PnR
+    if meta["$DATATYPE"].upper() == "I":
+        rng = int(float(meta.get(f"$P{i + 1}R", 0)) or 0)
+        if rng and rng & (rng - 1) == 0:
+            x = np.mod(x, rng)
+
+    positive = x > 0
+    n_pos = np.count_nonzero(positive)
+    log_sum = np.log(x, where=positive, out=np.zeros_like(x)).sum()
+    mean = x.mean()
+    return {
+        "Geometric Mean": np.exp(log_sum / n_pos) if n_pos else np.nan,
+        "Median": np.median(x),
+        "Mean": mean,
+        "CV": x.std(ddof=1) / mean * 100 if mean else np.nan,
+    }
+
+
+def fcs_statistics(file_path, stats=STATS, population="Ungated"):
+    # One FlowJo-table row for a single FCS file
+    meta = read_fcs_metadata(file_path)
+    events = read_fcs_events(file_path, meta)
+
+    row = {"": os.path.basename(file_path)}
+    for i, channel in enumerate(channel_names(meta)):
+        computed = _channel_stats(events[:, i], meta, i)
+        for stat in stats:
+            row[f"{population} | {stat} {channel}"] = computed[stat]
+    return row
+
+
+def _natural_key(path):
+    # A2.fcs before A10.fcs, like FlowJo's sample order
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", os.path.basename(path))]
+
+
+def _expand(paths):
+    if isinstance(paths, str):
+        paths = glob.glob(os.path.join(paths, "*.fcs")) if os.path.isdir(paths) else glob.glob(paths)
+    return sorted(paths, key=_natural_key)
+
+
+def fcs_table(paths, stats=STATS, population="Ungated", max_workers=None):
+    # paths: list of .fcs files, a directory or a glob; wells are read in parallel
+    paths = _expand(paths)
+    if not paths:
+        raise FileNotFoundError("No .fcs files found.")
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        rows = list(pool.map(fcs_statistics, paths, [stats] * len(paths), [population] * len(paths)))
+    return pd.DataFrame(rows)
+
+
+def fcs_to_flowjo_table(paths, out_csv, stats=STATS, population="Ungated", max_workers=None):
+    # Same layout as a FlowJo table export (incl. the trailing Mean/SD rows),
+    # so every plotter and load_flowjo_table can read it unchanged
+    table = fcs_table(paths, stats, population, max_workers)
+    values = table.iloc[:, 1:]
+    footer = pd.DataFrame([["Mean", *values.mean()], ["SD", *values.std()]], columns=table.columns)
+    out = pd.concat([table, footer], ignore_index=True)
+
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+    out.to_csv(out_csv, index=False)
+    return out
+
+
+if __name__ == "__main__":
+    fcs_to_flowjo_table("data/fcs", "data/fcs FlowJo table.csv")
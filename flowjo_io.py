@@ -0,0 +1,291 @@
+import csv
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = ".flowjo_cache"
+
+# pyarrow's multithreaded CSV reader when it is installed, pandas' C parser otherwise
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+# In-process cache: abs path -> table state (header, parsed column arrays, sidecar meta)
+_tables = {}
+
+
+def _file_digest(file_path):
+    h = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sidecar_dir(file_path):
+    # One sidecar folder per table, next to the CSV (e.g. data/.flowjo_cache/...)
+    abs_path = os.path.abspath(file_path)
+    key = hashlib.sha1(abs_path.encode()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(file_path))[0].replace(" ", "_")
+    return os.path.join(os.path.dirname(abs_path), CACHE_DIR, f"{stem}-{key}")
+
+
+def _read_meta(sidecar):
+    try:
+        with open(os.path.join(sidecar, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(sidecar, meta):
+    tmp = os.path.join(sidecar, f"meta.json.tmp{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(sidecar, "meta.json"))
+
+
+def _sidecar_is_current(sidecar, meta, file_path, st):
+    if meta is None or "masks" not in meta or meta["raw_columns"][0].startswith("\ufeff"):
+        # Missing, from before text columns kept their NaNs, or with a raw
+        # header read before the BOM was stripped
+        return False
+    if meta["mtime_ns"] == st.st_mtime_ns and meta["size"] == st.st_size:
+        return True
+    # mtime changed (copied / touched) - fall back to the content hash
+    if meta["size"] == st.st_size and meta["sha1"] == _file_digest(file_path):
+        meta["mtime_ns"] = st.st_mtime_ns
+        _write_meta(sidecar, meta)
+        return True
+    return False
+
+
+def _read_header(file_path):
+    # pandas-style names ("Unnamed: 0" for FlowJo's blank first header) and the raw ones
+    # utf-8-sig: a BOM (Excel re-saves) is not part of the first name; both
+    # CSV engines drop it too
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        raw = next(csv.reader(f))
+    return list(pd.read_csv(file_path, nrows=0).columns), raw
+
+
+def _table_state(abs_path):
+    st = os.stat(abs_path)
+    state = _tables.get(abs_path)
+    if state is not None and state["mtime_ns"] == st.st_mtime_ns and state["size"] == st.st_size:
+        return state
+
+    sidecar = _sidecar_dir(abs_path)
+    meta = _read_meta(sidecar)
+    if not _sidecar_is_current(sidecar, meta, abs_path, st):
+        # New or changed table: start an empty sidecar, columns get added as they are parsed
+        meta = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha1": _file_digest(abs_path),
+            "files": {},
+            "masks": {},
+        }
+        meta["columns"], meta["raw_columns"] = _read_header(abs_path)
+        shutil.rmtree(sidecar, ignore_errors=True)
+        try:
+            os.makedirs(sidecar, exist_ok=True)
+            _write_meta(sidecar, meta)
+        except OSError:
+            # read-only data folder: still fine, just no sidecar
+            sidecar = None
+
+    state = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "header": meta["columns"],
+        "raw_header": meta["raw_columns"],
+        "sidecar": sidecar,
+        "files": dict(meta["files"]),
+        # column -> .npy of its missing-value mask (text columns with NaNs only)
+        "masks": dict(meta.get("masks", {})),
+        "arrays": {},
+    }
+    _tables[abs_path] = state
+    return state
+
+
+def _parse_columns(file_path, header, raw_header, columns, engine=None, **kwargs):
+    # Parse only the requested columns, then put back the pandas names so the
+    # unnamed first column is "Unnamed: 0" under either engine
+    engine = engine or CSV_ENGINE
+    if engine == "pyarrow" and len(set(raw_header)) < len(raw_header):
+        # Repeated header names: pyarrow can only select by raw name, which
+        # can't tell "a" from the second "a", so select positionally instead
+        engine = "c"
+    positions = sorted(header.index(c) for c in columns)
+    # pyarrow only takes names (raw, "" for the blank header), the C parser takes positions
+    usecols = [raw_header[i] for i in positions] if engine == "pyarrow" else positions
+    parsed = pd.read_csv(file_path, usecols=usecols, engine=engine, **kwargs)
+    names = [header[i] for i in positions]
+    if kwargs.get("chunksize"):
+        return (chunk.set_axis(names, axis=1) for chunk in parsed)
+    return parsed.set_axis(names, axis=1)
+
+
+def _save_array(sidecar, fname, values):
+    tmp = os.path.join(sidecar, f"{fname}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        np.save(f, values, allow_pickle=False)
+    os.replace(tmp, os.path.join(sidecar, fname))
+
+
+def _load_column(state, col):
+    values = np.load(os.path.join(state["sidecar"], state["files"][col]), mmap_mode="r")
+    mask = state["masks"].get(col)
+    if mask is not None:
+        # Text column with missing values: back to object with NaNs, as parsed
+        values = values.astype(object)
+        values[np.load(os.path.join(state["sidecar"], mask))] = np.nan
+    return values
+
+
+def _store_columns(state, arrays):
+    sidecar = state["sidecar"]
+    if sidecar is None:
+        return
+    try:
+        for col, values in arrays.items():
+            stem = f"c-{hashlib.sha1(col.encode()).hexdigest()[:16]}"
+            if values.dtype == object:
+                # Well labels etc. -> fixed-width unicode so they can be memory-mapped
+                # too; missing values go in a mask, not as the string "nan"
+                missing = pd.isna(values)
+                values = np.where(missing, "", values).astype(str)
+                if missing.any():
+                    _save_array(sidecar, f"{stem}-na.npy", missing)
+                    state["masks"][col] = f"{stem}-na.npy"
+            _save_array(sidecar, f"{stem}.npy", values)
+            state["files"][col] = f"{stem}.npy"
+
+        # Merge with whatever other processes have added meanwhile
+        meta = _read_meta(sidecar)
+        if meta is None:
+            return
+        meta["files"].update(state["files"])
+        meta.setdefault("masks", {}).update(state["masks"])
+        _write_meta(sidecar, meta)
+    except OSError:
+        pass
+
+
+def _compact(df):
+    # Categorical Well labels, float32 statistics
+    df[df.columns[0]] = df[df.columns[0]].astype("category")
+    floats = df.select_dtypes("float64").columns
+    if len(floats):
+        df[floats] = df[floats].astype("float32")
+    return df
+
+
+def _resolve_columns(header, columns):
+    if columns is None:
+        return list(header)
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise KeyError(f"Columns not in table: {missing}")
+    # First (Well) column always comes along, everything in table order
+    wanted = {header[0], *columns}
+    return [c for c in header if c in wanted]
+
+
+def load_flowjo_table(file_path, columns=None, compact=False, use_cache=True):
+    # Parse a FlowJo table CSV once; later calls (this process or later runs)
+    # read the memory-mapped .npy sidecar instead of re-parsing the CSV.
+    # columns limits the load to the Well column plus the given statistics.
+    if not use_cache:
+        header, raw_header = _read_header(file_path)
+        df = _parse_columns(file_path, header, raw_header, _resolve_columns(header, columns))
+        return _compact(df) if compact else df
+
+    abs_path = os.path.abspath(file_path)
+    state = _table_state(abs_path)
+    columns = _resolve_columns(state["header"], columns)
+    arrays = state["arrays"]
+
+    for col in columns:
+        if col not in arrays and col in state["files"]:
+            try:
+                arrays[col] = _load_column(state, col)
+            except (OSError, ValueError):
+                pass
+
+    missing = [c for c in columns if c not in arrays]
+    if missing:
+        parsed = _parse_columns(abs_path, state["header"], state["raw_header"], missing)
+        new = {col: parsed[col].to_numpy() for col in missing}
+        arrays.update(new)
+        _store_columns(state, new)
+
+    df = pd.DataFrame({col: arrays[col] for col in columns}, copy=False)
+    return _compact(df) if compact else df
+
+
+def iter_flowjo_chunks(file_path, columns=None, chunksize=100_000, compact=False):
+    # Stream a very long table in row chunks, reading only the needed columns
+    header, raw_header = _read_header(file_path)
+    chunks = _parse_columns(file_path, header, raw_header, _resolve_columns(header, columns), engine="c", chunksize=chunksize)
+    for chunk in chunks:
+        yield _compact(chunk) if compact else chunk
+
+
+def clean_flowjo_table(df):
+    # Same cleaning the plotters do: first column -> Well, Mean/SD footer rows
+    # dropped, "A1.fcs " -> "A1"
+    df = df.rename(columns={df.columns[0]: "Well"})
+    df = df[~df["Well"].isin(["Mean", "SD"])].reset_index(drop=True)
+    df["Well"] = df["Well"].astype(str).str.replace(r"\.fcs$", "", regex=True).str.strip()
+    return df
+
+
+def expand_tables(paths):
+    # paths: list of CSVs, a directory or a glob; exporters' temp/lock files are skipped
+    if isinstance(paths, str):
+        paths = glob.glob(os.path.join(paths, "*.csv")) if os.path.isdir(paths) else glob.glob(paths)
+    return sorted(p for p in paths if not os.path.basename(p).startswith((".", "~$")))
+
+
+def _load_clean(file_path, columns=None, compact=False):
+    df = clean_flowjo_table(load_flowjo_table(file_path, columns=columns, compact=compact))
+    if compact:
+        df["Well"] = df["Well"].astype("category")
+    return df
+
+
+def iter_flowjo_tables(paths, columns=None, compact=False, max_workers=None, processes=False):
+    # Yield (path, cleaned frame) for many tables as each finishes loading, so
+    # the caller can summarize the first ones while the rest still parse.
+    # Threads by default (the pyarrow reader and file I/O release the GIL, and
+    # parsed columns land in this process's cache); processes=True for the C
+    # parser / very many small files. A table that fails raises when reached.
+    paths = expand_tables(paths)
+    if not paths:
+        raise FileNotFoundError("No FlowJo tables found.")
+
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1)) as pool:
+        futures = {pool.submit(_load_clean, path, columns, compact): path for path in paths}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Consumer stopped early (or a table failed): don't parse the rest
+            for future in futures:
+                future.cancel()
+
+
+def clear_cache(file_path=None):
+    if file_path is None:
+        _tables.clear()
+    else:
+        _tables.pop(os.path.abspath(file_path), None)
@@ -0,0 +1,185 @@
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# None = tracing off (stage() is then a no-op); a list of records when on
+_records = None
+_figure = None
+
+# Peak RSS (MB) so far of every open stage, outermost first (stages nest on one
+# thread); _can_reset is None until we know whether this process can reset its
+# high-water mark (Linux /proc)
+_open_peaks = []
+_can_reset = None
+
+
+def enable_tracing():
+    global _records
+    _records = []
+
+
+def disable_tracing():
+    global _records
+    _records = None
+
+
+def tracing_enabled():
+    return _records is not None
+
+
+def _process_peak_rss_mb():
+    # High-water mark of the process so far (ru_maxrss is KB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _hwm_mb():
+    # Resettable high-water mark (VmHWM, KB)
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise OSError("no VmHWM")
+
+
+def _reset_hwm():
+    # "5" resets VmHWM to the current RSS (Linux 4.0+)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _begin_peak():
+    # Fold the peak so far into every enclosing stage, then reset the mark so
+    # the new stage only sees its own peak
+    global _can_reset
+    if _can_reset is False:
+        return
+    try:
+        now = _hwm_mb()
+        _reset_hwm()
+        _can_reset = True
+    except OSError:
+        _can_reset = False
+        return
+    _open_peaks[:] = [max(p, now) for p in _open_peaks]
+    _open_peaks.append(0.0)
+
+
+def _end_peak():
+    # This stage's peak RSS, or None where the mark can't be reset
+    if not _can_reset:
+        return None
+    peak = max(_open_peaks.pop(), _hwm_mb())
+    if _open_peaks:
+        _open_peaks[-1] = max(_open_peaks[-1], peak)
+    return peak
+
+
+@contextlib.contextmanager
+def batch(label):
+    # Tags every stage inside with label (e.g. loading shared by several
+    # figures), without recording a figure total; figure() inside overrides it
+    global _figure
+    previous, _figure = _figure, label
+    try:
+        yield
+    finally:
+        _figure = previous
+
+
+def batch_label(names):
+    # Label for stages shared by these figures: the figure itself when there
+    # is one, else the first one + how many more
+    return names[0] if len(names) == 1 else f"{names[0]} (+{len(names) - 1} more)"
+
+
+@contextlib.contextmanager
+def figure(label):
+    # Tags every stage inside with the figure it belongs to, and records the figure total
+    with batch(label), stage("figure"):
+        yield
+
+
+@contextlib.contextmanager
+def stage(name):
+    if _records is None:
+        yield
+        return
+
+    # peak_rss_mb: highest RSS during this stage (Linux). Elsewhere it is None and
+    # process_peak_rss_mb has the process's lifetime high-water mark instead (on
+    # Linux the resets make that mark per-stage too, so it is left out)
+    _begin_peak()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        _records.append({
+            "figure": _figure,
+            "stage": name,
+            "wall_s": time.perf_counter() - wall0,
+            "cpu_s": time.process_time() - cpu0,
+            "peak_rss_mb": _end_peak(),
+            "process_peak_rss_mb": None if _can_reset else _process_peak_rss_mb(),
+            "pid": os.getpid(),
+        })
+
+
+def records():
+    return list(_records or [])
+
+
+def extend_records(new):
+    # Merge records coming back from worker processes
+    if _records is not None:
+        _records.extend(new)
+
+
+def write_trace(path, recs=None):
+    # .json -> list of records, anything else -> CSV
+    recs = records() if recs is None else recs
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(recs, f, indent=1)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["figure", "stage", "wall_s", "cpu_s", "peak_rss_mb", "process_peak_rss_mb", "pid"])
+        writer.writeheader()
+        writer.writerows(recs)
+
+
+def summary_table(recs=None):
+    import pandas as pd
+
+    recs = records() if recs is None else recs
+    if not recs:
+        return pd.DataFrame(columns=["stage", "count", "wall_total_s", "wall_mean_s", "wall_max_s", "cpu_total_s", "peak_rss_mb"])
+    df = pd.DataFrame(recs)
+    if "process_peak_rss_mb" in df:
+        # No per-stage peaks on this platform: the process high-water mark
+        df["peak_rss_mb"] = df["peak_rss_mb"].fillna(df["process_peak_rss_mb"])
+    return (
+        df.groupby("stage", sort=False)
+          .agg(count=("wall_s", "size"),
+               wall_total_s=("wall_s", "sum"),
+               wall_mean_s=("wall_s", "mean"),
+               wall_max_s=("wall_s", "max"),
+               cpu_total_s=("cpu_s", "sum"),
+               peak_rss_mb=("peak_rss_mb", "max"))
+          .reset_index()
+    )
+
+
+def print_summary(recs=None):
+    print(summary_table(recs).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
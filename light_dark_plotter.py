@@ -1,14 +1,37 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import datetime
 import sys
 import os
 
+import build_manifest
+from export import PAD_INCHES, TRANSPARENT, current_profile, export_figure, output_paths, profile_rc, profile_settings, rasterize_dense, report_sizes
+from flowjo_io import load_flowjo_table
+from instrumentation import batch, batch_label, figure, stage
+from plate_data import PlateData
+from plate_layout import join_layout, load_plate_layout
+from resampling import annotate_significance, compare_groups, fdr_bh
+
 NUM_REPS = 3
+INDEX_ROWS = 40  # channels listed per report index page
+
+# Small-multiple facets: constructs per panel, panel size (inches), panels per
+# page (rows, columns); raster tiles go on A4 portrait pages
+FACET_SIZE = 12
+FACET_FIGSIZE = (6.5, 4)
+FACET_GRID = (4, 2)
+FACET_PAGE = (8.27, 11.69)
+
+# Code that shapes a light/dark figure: parsing, grouping, statistics, export
+# (dpi, padding, profiles). Editing any of them invalidates built figures.
+RENDER_SOURCES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py")
+    for name in ("light_dark_plotter", "export", "flowjo_io", "plate_data", "plate_layout", "resampling")
+]
+
 pd.set_option('display.max_columns', None)
 
-plt.rcParams.update({
+RC_PARAMS = {
     "font.family": "sans-serif",
     "font.sans-serif": ["Arial"],  
     "font.size": 10,                   
@@ -16,75 +39,548 @@ plt.rcParams.update({
     "axes.titlesize": 12,
     "xtick.labelsize": 10,
     "ytick.labelsize": 10,
-})
+}
 
-def generate_light_dark_plot(file_path, savefile, col_name, y_label, row_names, light_dark):
-    # Create plots folder (safe if exists)
-    os.makedirs("plots", exist_ok=True)
 
+def _pyplot():
+    # matplotlib is only imported once a figure is actually drawn,
+    # so summary-only runs never pay for it
+    import matplotlib.pyplot as plt
+    plt.rcParams.update(RC_PARAMS)
+    return plt
+
+
+def _prepare_light_dark(df, row_names, light_dark, layout=None):
     # Load & clean
-    df = pd.read_csv(file_path)
     df = df.rename(columns={df.columns[0]: 'Well'})
-    df = df[~df['Well'].isin(['Mean', 'SD'])].copy()
+    df = df[~df['Well'].isin(['Mean', 'SD'])]
+
+    if layout is not None:
+        return _prepare_from_layout(df, light_dark, layout)
+
+    # numeric/2-char prefixes, ordered like the light_dark mapping
+    prefix2 = pd.Categorical(df["Well"].str[:2], categories=list(light_dark))
+    d = df[~pd.isna(prefix2)].copy()
+    d["prefix2"] = prefix2[~pd.isna(prefix2)]
 
-    # # e.g. "light A1" -> "light" 
-    # df["prefix"] = df["Well"].str.split().str[0].str.lower()
+    # Group every 3 rows within a prefix → 1 construct
+    d["group"] = d.groupby("prefix2", observed=True).cumcount() // NUM_REPS
 
-    # numeric/2-char prefixes 
-    df["prefix2"] = df["Well"].str[:2]  
+    n_groups = d.groupby("prefix2", observed=True)["group"].max() + 1
+    for prefix, n in n_groups.items():
+        if len(row_names) < n:
+            raise ValueError(f"row_names has {len(row_names)} items but prefix {prefix} needs {n}.")
 
+    d["WellLabel"] = d["group"].map(dict(enumerate(row_names)))
+    d["condition"] = d["prefix2"].map({p: meta["condition"] for p, meta in light_dark.items()})
+    d["color"] = d["prefix2"].map({p: meta["color"] for p, meta in light_dark.items()})
+    return d
 
-    raw_by_prefix = {}
-    summaries = []
 
+def _prepare_from_layout(df, light_dark, layout):
+    # Condition/construct come from the plate layout; light_dark only supplies
+    # colours and condition order (first prefix with that condition)
+    d = join_layout(df, layout)
+    cond_prefix = {}
     for prefix, meta in light_dark.items():
-        condition = meta["condition"]
-        color = meta["color"]
+        cond_prefix.setdefault(meta["condition"], prefix)
+
+    prefix2 = pd.Categorical(d["condition"].astype(object).map(cond_prefix), categories=list(light_dark))
+    d = d[~pd.isna(prefix2)].copy()
+    d["prefix2"] = prefix2[~pd.isna(prefix2)]
+
+    d["group"] = d["construct"].cat.codes
+    d["WellLabel"] = d["construct"].astype(object)
+    d["condition"] = d["condition"].astype(object)
+    d["color"] = d["prefix2"].map({p: meta["color"] for p, meta in light_dark.items()})
+    return d
+
+
+def _light_dark_plate(d, col_names):
+    # Prepared frame -> PlateData with prefixes as conditions and constructs
+    # numbered in x-axis order (prefix order, then construct), so a replicate's
+    # construct code is its slot on the x-axis. Also returns construct -> group.
+    first = d.sort_values(["prefix2", "group"], kind="stable").drop_duplicates("WellLabel")
+    wells = first["WellLabel"].tolist()
+    plate = PlateData(
+        d["Well"].astype(str).to_numpy(), col_names, d[list(col_names)].to_numpy(),
+        d["prefix2"].cat.codes.to_numpy(), pd.Index(wells).get_indexer(d["WellLabel"]),
+        list(d["prefix2"].cat.categories), wells,
+        d["replicate"].to_numpy() if "replicate" in d else None,
+    )
+    return plate, first["group"].to_numpy()
+
+
+def _summarize_plate(plate, groups, light_dark):
+    # mean/std/n for every column and every (prefix, construct) from one set of
+    # reduceat calls; a row per (column, prefix, construct)
+    mean, std, n = plate.group_stats()
+    cond, construct = plate.groups()
+    prefix = np.asarray(plate.conditions, dtype=object)[cond]
+    k = len(plate.columns)
+    return pd.DataFrame({
+        "column": np.repeat(np.asarray(plate.columns, dtype=object), len(cond)),
+        "prefix": pd.Categorical(np.tile(prefix, k), categories=plate.conditions),
+        "condition": np.tile(np.array([light_dark[p]["condition"] for p in prefix], dtype=object), k),
+        "color": np.tile(np.array([light_dark[p]["color"] for p in prefix], dtype=object), k),
+        "group": np.tile(groups[construct], k),
+        "WellLabel": np.tile(np.asarray(plate.constructs, dtype=object)[construct], k),
+        # (groups × columns) -> column-major, matching the row order above
+        "mean": mean.T.ravel(),
+        "std": std.T.ravel(),
+        "n": n.T.ravel(),
+    })
+
+
+def summarize_light_dark(file_path, col_names, row_names, light_dark, layout=None):
+    # One tidy frame: a row per (column, prefix, construct) with mean/std/n.
+    # With a plate layout, constructs/conditions come from it instead of row order.
+    d = _prepare_light_dark(load_flowjo_table(file_path, columns=col_names), row_names, light_dark, layout)
+    return _summarize_plate(*_light_dark_plate(d, col_names), light_dark)
+
+
+def light_dark_tests(d, col_names, light_dark, **kwargs):
+    # Every other condition vs the first one (light_dark order), for every
+    # construct × column in one batched call: bootstrap CI of the difference in
+    # means + p-value, permutation or Welch (kwargs: n_boot, n_perm, seed, level, alpha)
+    conditions = list(dict.fromkeys(meta["condition"] for meta in light_dark.values()))
+    constructs = pd.Index(pd.unique(d["WellLabel"]))
+    cond_idx = pd.Index(conditions).get_indexer(d["condition"])
+    c_idx = constructs.get_indexer(d["WellLabel"])
+    rep = d.groupby([cond_idx, c_idx]).cumcount().to_numpy()
+
+    # (construct, condition, replicate, column), NaN where a replicate is missing
+    values = np.full((len(constructs), len(conditions), rep.max() + 1, len(col_names)), np.nan)
+    values[c_idx, cond_idx, rep] = d[list(col_names)].to_numpy(np.float64)
+    # -> (column, construct, replicate) per condition
+    per_cond = values.transpose(1, 3, 0, 2)
+    n_tests = len(col_names) * len(constructs)
+
+    others = range(1, len(conditions))
+    a = np.concatenate([per_cond[0].reshape(n_tests, -1) for _ in others])
+    b = np.concatenate([per_cond[j].reshape(n_tests, -1) for j in others])
+    res = compare_groups(a, b, **kwargs)
+
+    tests = pd.DataFrame({
+        "column": np.tile(np.repeat(list(col_names), len(constructs)), len(others)),
+        "construct": np.tile(constructs.to_numpy(), len(col_names) * len(others)),
+        "condition_a": conditions[0],
+        "condition_b": np.repeat([conditions[j] for j in others], n_tests),
+        **res,
+    })
+    tests["q"] = fdr_bh(tests["p"])
+    return tests
+
+
+def light_dark_significance(file_path, col_names, row_names, light_dark, layout=None, **kwargs):
+    d = _prepare_light_dark(load_flowjo_table(file_path, columns=col_names), row_names, light_dark, layout)
+    return light_dark_tests(d, col_names, light_dark, **kwargs)
+
+
+def _channel(col_name):
+    # "... (FL1-A :: 355nm405-30-A)" -> "355nm405-30-A"
+    return col_name.split("::")[1].strip().split(" ")[0].split(")")[0]
+
+
+def light_dark_outputs(savefile, col_name, y_label, formats=None):
+    return output_paths(f"{savefile}-light-dark-{y_label}-{_channel(col_name)}", formats)
+
+
+def light_dark_report_path(savefile, y_label):
+    return output_paths(f"{savefile}-light-dark-{y_label}-report", ["pdf"])[0]
+
+
+def light_dark_key(file_path, savefile, col_name, y_label, row_names, light_dark, layout=None, annotate=False):
+    # Data file (+ layout file) + the rendering code + every render parameter,
+    # output profile included
+    files = [file_path, *RENDER_SOURCES]
+    if isinstance(layout, str):
+        files.append(layout)
+    elif layout is not None:
+        layout = load_plate_layout(layout).to_csv()
+    return build_manifest.inputs_key(
+        files,
+        savefile=savefile, col_name=col_name, y_label=y_label,
+        row_names=list(row_names), light_dark=light_dark, layout=layout, annotate=annotate,
+        profile=current_profile(),
+    )
 
-        # # e.g. "light A1" -> "light" 
-        # d = df[df["prefix"] == prefix.lower()].copy()
 
-        # numeric/2-char prefixes 
-        d = df[df["prefix2"] == prefix].copy()
+def _load_summarized(file_path, col_names, row_names, light_dark, layout=None, annotate=False, label=None):
+    # label: which figure(s) the load/summarize/tests stages are traced under
+    with batch(label):
+        # Only the Well column + the plotted statistics, categorical labels / float32 values
+        with stage("load"):
+            df = load_flowjo_table(file_path, columns=col_names, compact=True)
 
-        if d.empty:
-            continue
+        with stage("summarize"):
+            d = _prepare_light_dark(df, row_names, light_dark, layout)
 
-        # Group every 3 rows → 1 construct
-        d["idx_in_prefix"] = range(len(d))
-        d["group"] = d["idx_in_prefix"] // 3
-        n_groups = d["group"].max() + 1
+            if d.empty:
+                print("No data matched the provided prefixes.")
+                return None
 
-        if len(row_names) < n_groups:
-            raise ValueError(f"row_names has {len(row_names)} items but prefix {prefix} needs {n_groups}.")
-        d["WellLabel"] = d["group"].map(dict(enumerate(row_names)))
+            # Clean + group once into flat arrays, summarize every column in one pass;
+            # the plate's construct order is the x-axis order
+            plate, groups = _light_dark_plate(d, col_names)
+            summary = _summarize_plate(plate, groups, light_dark)
+            wells = plate.constructs
 
-        raw_by_prefix[prefix] = d
+        tests = None
+        if annotate:
+            with stage("tests"):
+                tests = light_dark_tests(d, col_names, light_dark)
 
-        # Summary per construct
-        summ = (
-            d.groupby("group", as_index=False)[col_name]
-              .agg(mean="mean", std="std")
-              .assign(prefix=prefix, condition=condition, color=color)
-        )
-        summ["WellLabel"] = summ["group"].map(dict(enumerate(row_names)))
-        summaries.append(summ)
+        return summary, wells, plate, tests
 
-    if not summaries:
-        print("No data matched the provided prefixes.")
-        return
 
-    combined = pd.concat(summaries, ignore_index=True)
+def generate_light_dark_plot(file_path, savefile, col_name, y_label, row_names, light_dark, show=True, incremental=False, layout=None, formats=None, annotate=False):
+    generate_light_dark_plots(file_path, savefile, [col_name], y_label, row_names, light_dark, show=show, incremental=incremental, layout=layout, formats=formats, annotate=annotate)
+
 
+def generate_light_dark_plots(file_path, savefile, col_names, y_label, row_names, light_dark, show=True, incremental=False, layout=None, formats=None, annotate=False, template=False):
+    # annotate=True: significance of each condition vs the first above every bar
+    # template=True: build the figure once and update it in place for each column
+    # Create plots folder (safe if exists)
+    os.makedirs("plots", exist_ok=True)
+
+    keys = {}
+    if incremental:
+        # Skip figures whose data, column and render parameters are unchanged
+        manifest = build_manifest.load_manifest()
+        for col_name in col_names:
+            key = light_dark_key(file_path, savefile, col_name, y_label, row_names, light_dark, layout, annotate)
+            if not build_manifest.is_current(light_dark_outputs(savefile, col_name, y_label, formats), key, manifest):
+                keys[col_name] = key
+
+        skipped = len(col_names) - len(keys)
+        if skipped:
+            print(f"Skipping {skipped} up-to-date figure(s).")
+        if not keys:
+            return
+        col_names = list(keys)
+
+    label = batch_label([os.path.basename(light_dark_outputs(savefile, c, y_label, formats)[0]) for c in col_names])
+    loaded = _load_summarized(file_path, col_names, row_names, light_dark, layout, annotate, label)
+    if loaded is None:
+        return
+    summary, wells, plate, tests = loaded
+
+    reused = None
+    for col_name, combined in summary.groupby("column", sort=False):
+        col_tests = None if tests is None else tests[tests["column"] == col_name]
+        with figure(os.path.basename(light_dark_outputs(savefile, col_name, y_label, formats)[0])):
+            fig = _plot_light_dark(plate, combined, wells, savefile, col_name, y_label, light_dark,
+                                   show, formats, col_tests, reused, keep=template)
+        if template and reused is None:
+            reused = LightDarkTemplate(fig, plate, wells, light_dark)
+        if incremental:
+            build_manifest.record(light_dark_outputs(savefile, col_name, y_label, formats), keys[col_name])
+
+    if reused is not None and not show:
+        _pyplot().close(reused.fig)
+
+
+def generate_light_dark_report(file_path, savefile, col_names, y_label, row_names, light_dark, incremental=False, layout=None, annotate=False, template=False):
+    # Every column of one table as a page of a single PDF (fonts embedded once),
+    # behind an index of channels. Each figure is closed as soon as its page is
+    # written, so memory stays flat however many columns there are.
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    out_path = light_dark_report_path(savefile, y_label)
+    if incremental:
+        # One key for the whole report: every column + the render parameters
+        key = light_dark_key(file_path, savefile, list(col_names), y_label, row_names, light_dark, layout, annotate)
+        if build_manifest.is_current([out_path], key):
+            print("Report is up to date.")
+            return out_path
+
+    loaded = _load_summarized(file_path, col_names, row_names, light_dark, layout, annotate, os.path.basename(out_path))
+    if loaded is None:
+        return None
+    summary, wells, plate, tests = loaded
+
+    plt = _pyplot()
+    n_index = -(-len(col_names) // INDEX_ROWS)
+    entries = [(n_index + i + 1, _channel(c), c) for i, c in enumerate(col_names)]
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp = f"{out_path}.tmp{os.getpid()}"
+    metadata = {"Title": f"{savefile} light/dark {y_label}", "Subject": os.path.basename(file_path)}
+    # Font embedding and compression are fixed when the file is opened/closed,
+    # so the output profile's rcParams cover the whole report
+    dpi = profile_settings()["dpi"]
+    with profile_rc(), PdfPages(tmp, metadata=metadata) as pdf:
+        for start in range(0, len(entries), INDEX_ROWS):
+            fig = _draw_index(plt, entries[start:start + INDEX_ROWS], f"{savefile} - {y_label}", file_path)
+            pdf.savefig(fig)
+            plt.close(fig)
+
+        reused = None
+        for col_name, combined in summary.groupby("column", sort=False):
+            with figure(f"{os.path.basename(out_path)}:{_channel(col_name)}"):
+                col_tests = None if tests is None else tests[tests["column"] == col_name]
+                with stage("draw"):
+                    if reused is not None:
+                        fig = reused.update(combined, col_name, col_tests)
+                    else:
+                        fig = _draw_light_dark(plt, plate, combined, wells, y_label, col_name, light_dark, col_tests)
+                    fig.suptitle(col_name, fontsize=8)
+                if reused is None:
+                    with stage("layout"):
+                        fig.tight_layout()
+                with stage("save_page"):
+                    rasterize_dense(fig)
+                    bbox = fig.get_tightbbox().padded(PAD_INCHES)
+                    pdf.savefig(fig, bbox_inches=bbox, dpi=dpi, transparent=TRANSPARENT)
+                if template and reused is None:
+                    reused = LightDarkTemplate(fig, plate, wells, light_dark)
+                elif reused is None:
+                    plt.close(fig)
+        if reused is not None:
+            plt.close(reused.fig)
+    os.replace(tmp, out_path)
+    if profile_settings()["report_sizes"]:
+        report_sizes([out_path])
+
+    if incremental:
+        build_manifest.record([out_path], key)
+    return out_path
+
+
+def _draw_index(plt, entries, title, file_path):
+    # A4 page listing (page, channel, column) for each figure in the report
+    fig = plt.figure(figsize=(8.27, 11.69))
+    fig.text(0.08, 0.95, title, fontsize=14, weight="bold")
+    fig.text(0.08, 0.925, f"{os.path.basename(file_path)}, {datetime.date.today()}", fontsize=9, color="0.4")
+    for i, (page, channel, col_name) in enumerate(entries):
+        y = 0.89 - i * 0.021
+        fig.text(0.08, y, str(page), fontsize=9)
+        fig.text(0.13, y, channel, fontsize=9)
+        fig.text(0.33, y, col_name, fontsize=6, color="0.3")
+    return fig
+
+
+def facet_panels(wells, group_by=None, size=FACET_SIZE, plate_rows=None):
+    # Split the x-axis constructs into panels of at most `size`, in plotting order.
+    #   group_by=None      consecutive runs of `size` constructs
+    #   "family"           name before the first "_" (ICR186_0 / ICR186_10 -> ICR186)
+    #   "row"              plate row of the construct's first well (plate_rows: construct -> row)
+    #   dict / callable    construct -> group name
+    # Returns [(title, constructs)]; groups larger than `size` continue over several panels.
+    if group_by is None:
+        key = lambda w: ""
+    elif group_by == "family":
+        key = lambda w: str(w).split("_")[0]
+    elif group_by == "row":
+        key = plate_rows.get
+    elif isinstance(group_by, dict):
+        key = lambda w: group_by.get(w, "other")
+    else:
+        key = group_by
+
+    groups = {}
+    for w in wells:
+        groups.setdefault(key(w), []).append(w)
+
+    panels = []
+    for name, members in groups.items():
+        chunks = [members[i:i + size] for i in range(0, len(members), size)]
+        for i, chunk in enumerate(chunks):
+            if group_by is None:
+                title = f"{chunk[0]} - {chunk[-1]}"
+            else:
+                title = str(name) if len(chunks) == 1 else f"{name} ({i + 1}/{len(chunks)})"
+            panels.append((title, chunk))
+    return panels
+
+
+def _plate_rows(plate, wells):
+    # construct -> plate row letters of its first well ("01-B7.fcs" -> "B")
+    codes, first = np.unique(plate.construct, return_index=True)
+    rows = pd.Series(plate.wells[first]).str.extract(r"([A-Z]+)\d+(?:\.fcs)?\s*$", expand=False)
+    found = dict(zip(codes, rows))
+    return {w: found.get(i, "?") for i, w in enumerate(wells)}
+
+
+def _panel_data(plate, combined, panel, col_name, tests):
+    # Just this panel's constructs (renumbered for its own x-axis) and column
+    panel_tests = None if tests is None else tests[tests["construct"].isin(panel)]
+    return plate.subset(panel, [col_name]), combined[combined["WellLabel"].isin(panel)], panel, panel_tests
+
+
+def _init_facet_worker():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _draw_facet(plt, ax, panel_data, title, y_label, col_name, light_dark, ylim):
+    plate, combined, panel, tests = panel_data
+    _draw_light_dark(plt, plate, combined, panel, y_label, col_name, light_dark, tests, ax=ax)
+    # Same scale in every panel; significance labels may still need headroom
+    ax.set_ylim(ylim[0], max(ylim[1], ax.get_ylim()[1]))
+    ax.set_title(title, fontsize=12)
+
+
+def _render_facet_page(panels, y_label, col_name, light_dark, ylim):
+    # Worker process: one page of panels as a vector figure, laid out here and
+    # pickled back, so the parent only writes it. Each panel keeps the
+    # FACET_FIGSIZE geometry; the page is as large as the grid needs.
+    from matplotlib.figure import Figure
+
+    # Not a pyplot figure, so unpickling it doesn't open a window in the parent
+    plt = _pyplot()
+    n_rows, n_cols = FACET_GRID
+    fig = Figure(figsize=(FACET_FIGSIZE[0] * n_cols, FACET_FIGSIZE[1] * n_rows + 0.4), layout="constrained")
+    for sub, (panel_data, title) in zip(fig.subfigures(n_rows, n_cols).ravel(), panels):
+        _draw_facet(plt, sub.subplots(), panel_data, title, y_label, col_name, light_dark, ylim)
+    fig.suptitle(col_name, fontsize=10)
+    # Run the layout now and freeze it, instead of on save in the parent
+    fig.draw_without_rendering()
+    fig.set_layout_engine("none")
+    return fig
+
+
+def _render_facet(panel_data, title, y_label, col_name, light_dark, ylim, dpi):
+    # Worker process (raster=True): one panel -> uint8 RGB pixels, sent back to
+    # the parent for composing
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=FACET_FIGSIZE)
+    _draw_facet(plt, ax, panel_data, title, y_label, col_name, light_dark, ylim)
+    fig.tight_layout()
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    pixels = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+    plt.close(fig)
+    return pixels
+
+
+def _compose_facet_page(plt, tiles, title):
+    # FACET_GRID of tile images below a 4% strip for the column name
+    n_rows, n_cols = FACET_GRID
+    height = 0.96 / n_rows
+    fig = plt.figure(figsize=FACET_PAGE)
+    for i, pixels in enumerate(tiles):
+        r, c = divmod(i, n_cols)
+        ax = fig.add_axes([c / n_cols, 0.96 - (r + 1) * height, 1 / n_cols, height])
+        # interpolation="none": the tile is embedded as-is, not resampled
+        ax.imshow(pixels, interpolation="none")
+        ax.set_axis_off()
+    fig.suptitle(title, fontsize=8, y=0.985)
+    return fig
+
+
+def light_dark_facets_path(savefile, col_name, y_label):
+    return output_paths(f"{savefile}-light-dark-{y_label}-{_channel(col_name)}-facets", ["pdf"])[0]
+
+
+def generate_light_dark_facets(file_path, savefile, col_names, y_label, row_names, light_dark, group_by=None, size=FACET_SIZE,
+                               layout=None, annotate=False, max_workers=None, raster=False):
+    # Small multiples for large construct panels: constructs split into panels of
+    # at most `size` (see facet_panels), FACET_GRID per page, one PDF per column.
+    # Panels of a column share the y-axis scale. Each page is drawn and laid out
+    # in a worker process and stays vector. raster=True instead renders every
+    # panel to an image at the profile dpi in the workers and tiles them onto A4
+    # pages (smaller files for very many panels, but text and bars are pixels).
+    from concurrent.futures import ProcessPoolExecutor
+
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    label = batch_label([os.path.basename(light_dark_facets_path(savefile, c, y_label)) for c in col_names])
+    loaded = _load_summarized(file_path, col_names, row_names, light_dark, layout, annotate, label)
+    if loaded is None:
+        return []
+    summary, wells, plate, tests = loaded
+    panels = facet_panels(wells, group_by, size, _plate_rows(plate, wells) if group_by == "row" else None)
+    dpi = profile_settings()["dpi"]
+
+    if raster:
+        print(f"Facet panels are rasterized at {dpi} dpi (raster=True); text and bars are not vector.")
+
+    # Every page (or raster tile) of every column goes to the pool up front;
+    # files are written column by column while later columns are still rendering
+    per_page = FACET_GRID[0] * FACET_GRID[1]
+    by_column = {}
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_facet_worker) as pool:
+        for col_name, combined in summary.groupby("column", sort=False):
+            col_tests = None if tests is None else tests[tests["column"] == col_name]
+            bottoms = (combined["mean"] - combined["std"].fillna(0)).to_numpy(np.float64)
+            tops = (combined["mean"] + combined["std"].fillna(0)).to_numpy(np.float64)
+            dots = plate.column(col_name).astype(np.float64)
+            ylim = _y_limits(np.r_[bottoms, dots], np.r_[tops, dots])
+            col_panels = [(_panel_data(plate, combined, panel, col_name, col_tests), title) for title, panel in panels]
+            if raster:
+                jobs = [pool.submit(_render_facet, panel_data, title, y_label, col_name, light_dark, ylim, dpi)
+                        for panel_data, title in col_panels]
+            else:
+                jobs = [pool.submit(_render_facet_page, col_panels[i:i + per_page], y_label, col_name, light_dark, ylim)
+                        for i in range(0, len(col_panels), per_page)]
+            by_column[col_name] = jobs
+
+        plt = _pyplot()
+        written = []
+        for col_name in list(by_column):
+            jobs = by_column.pop(col_name)
+            out_path = light_dark_facets_path(savefile, col_name, y_label)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            tmp = f"{out_path}.tmp{os.getpid()}"
+            with figure(os.path.basename(out_path)), PdfPages(tmp, metadata={"Title": col_name}) as pdf:
+                while jobs:
+                    # Drop each page's results once written, so they don't pile up
+                    if raster:
+                        page, jobs = jobs[:per_page], jobs[per_page:]
+                        with stage("draw"):
+                            fig = _compose_facet_page(plt, [future.result() for future in page], col_name)
+                    else:
+                        fig = jobs.pop(0).result()
+                    with stage("save_page"):
+                        pdf.savefig(fig, dpi=dpi)
+                    plt.close(fig)
+            os.replace(tmp, out_path)
+            written.append(out_path)
+    if profile_settings()["report_sizes"]:
+        report_sizes(written)
+    return written
+
+
+def _plot_light_dark(plate, combined, wells, savefile, col_name, y_label, light_dark, show=True, formats=None, tests=None, template=None, keep=False):
+    # template: a LightDarkTemplate to update instead of drawing a new figure;
+    # keep=True leaves the figure open for the caller (to become a template)
+    plt = _pyplot()
+
+    if template is not None:
+        # Reused figure: no new axes and no per-column layout pass; the caller closes it
+        with stage("draw"):
+            fig = template.update(combined, col_name, tests)
+    else:
+        with stage("draw"):
+            fig = _draw_light_dark(plt, plate, combined, wells, y_label, col_name, light_dark, tests)
+
+        with stage("layout"):
+            fig.tight_layout()
+    if show:
+        plt.show()
+
+    export_figure(fig, light_dark_outputs(savefile, col_name, y_label, formats))
+
+    if not show and not keep:
+        plt.close(fig)
+    return fig
+
+
+def _draw_light_dark(plt, plate, combined, wells, y_label, col_name, light_dark, tests=None, figsize=(12, 3), ax=None):
+    # ax: draw into this axes (e.g. a facet page's panel) instead of a new figure
     # Prepare for plotting
-    conditions_present = [light_dark[p]["condition"] for p in raw_by_prefix.keys()]
+    conditions_present = [light_dark[p]["condition"] for p in plate.present_conditions()]
     unique_conditions = list(dict.fromkeys(conditions_present))
-    wells = combined["WellLabel"].drop_duplicates().tolist()
     x = np.arange(len(wells))
     n_conditions = len(unique_conditions)
     width = 0.8 / n_conditions
 
-    fig, ax = plt.subplots(figsize=(12, 3))
+    if ax is None:
+        fig, ax = plt.subplots(figsize=figsize)
+    else:
+        fig = ax.figure
 
     # Assign one color per condition (take first prefix's color that matches)
     cond_colors = {}
@@ -93,16 +589,21 @@ def generate_light_dark_plot(file_path, savefile, col_name, y_label, row_names,
         if cond not in cond_colors:
             cond_colors[cond] = meta["color"]
 
+    # Highest point (error bar or dot) per construct, for significance labels
+    tops = np.full(len(wells), -np.inf)
+    x_offsets = {}
+
     # Plot grouped bars
     for i, cond in enumerate(unique_conditions):
-        sub = combined[combined["condition"] == cond].copy()
-        sub = sub.set_index("WellLabel").reindex(wells).reset_index()
+        mean, std = _bar_values(combined, cond, wells)
         color = cond_colors[cond]
         x_offset = x + (i - (n_conditions - 1) / 2) * width
+        x_offsets[cond] = x_offset
+        tops = np.fmax(tops, mean + np.nan_to_num(std))
 
         ax.bar(
-            x_offset, sub["mean"],
-            yerr=sub["std"],
+            x_offset, mean,
+            yerr=std,
             width=width,
             color=color,
             edgecolor="black",
@@ -111,27 +612,17 @@ def generate_light_dark_plot(file_path, savefile, col_name, y_label, row_names,
             error_kw=dict(elinewidth=0.8, capthick=0.8)
         )
 
-        # Overlay dots (replicates)
+        # Overlay dots (replicates): one scatter per condition
         jitter = 0.06
         dot_size = 25
-        for prefix, meta in light_dark.items():
-            if meta["condition"] != cond:
-                continue
-            d_raw = raw_by_prefix[prefix]
-            grp_to_well = d_raw.drop_duplicates("group")[["group", "WellLabel"]].set_index("group")["WellLabel"]
-
-            for gi, well_label in enumerate(wells):
-                groups_for_well = grp_to_well[grp_to_well == well_label].index.tolist()
-                if not groups_for_well:
-                    continue
-                g = groups_for_well[0]
-                vals = d_raw.loc[d_raw["group"] == g, col_name].values
-                ax.scatter(
-                    np.repeat(x_offset[gi], len(vals)) + np.random.uniform(-jitter, jitter, len(vals)),
-                    vals,
-                    color=color,
-                    s=dot_size, alpha=1, zorder=3
-                )
+        pos, vals = _dot_values(plate, light_dark, cond, col_name)
+        ax.scatter(
+            x_offset[pos] + np.random.uniform(-jitter, jitter, len(vals)),
+            vals,
+            color=color,
+            s=dot_size, alpha=1, zorder=3
+        )
+        np.fmax.at(tops, pos, vals)
 
     # Format axes and legend
     ax.set_xticks(x)
@@ -145,31 +636,100 @@ def generate_light_dark_plot(file_path, savefile, col_name, y_label, row_names,
     ax.yaxis.grid(True, linestyle="-", linewidth=0.8, alpha=0.4)
     ax.set_axisbelow(True)
 
-    plt.xticks(rotation=45, ha='right', fontsize=10)
-    plt.tight_layout()
-    plt.show()
-    
-    date = datetime.date.today()
-    
-    
-    os.makedirs(f"plots/pdf/{date}", exist_ok=True)
-    os.makedirs(f"plots/svg/{date}", exist_ok=True)
-    
-    channel = col_name.split("::")[1].strip().split(" ")[0].split(")")[0]
-    
-    fig.savefig(
-        f"plots/pdf/{date}/{savefile}-light-dark-{y_label}-{channel}.pdf",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
-    
-    fig.savefig(
-        f"plots/svg/{date}/{savefile}-light-dark-{y_label}-{channel}.svg",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
+    _annotate_light_dark(ax, tests, unique_conditions, x_offsets, tops, wells)
+
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right", fontsize=10)
+    return fig
+
+
+def _bar_values(combined, cond, wells):
+    # mean / std of one condition, in x-axis order (NaN where a construct is missing)
+    sub = combined[combined["condition"] == cond].set_index("WellLabel").reindex(wells)
+    return sub["mean"].to_numpy(np.float64), sub["std"].to_numpy(np.float64)
+
+
+def _dot_values(plate, light_dark, cond, col_name):
+    # x-slot and value of every replicate of one condition (every prefix with
+    # that condition; each prefix is one contiguous run of the plate's rows)
+    rows = [plate.rows(p) for p in plate.present_conditions() if light_dark[p]["condition"] == cond]
+    pos = np.concatenate([plate.construct[r] for r in rows])
+    vals = np.concatenate([plate.column(col_name, r) for r in rows])
+    return pos, vals
+
+
+def _y_limits(bottoms, tops):
+    # 5% margins; bars keep their baseline at 0 unless something dips below it
+    lo, hi = np.nanmin(bottoms), np.nanmax(tops[np.isfinite(tops)], initial=0)
+    pad = 0.05 * (hi - lo or 1)
+    return lo - pad if lo < 0 else 0, hi + pad
+
+
+def _annotate_light_dark(ax, tests, conditions, x_offsets, tops, wells):
+    if tests is None:
+        return
+    # Each condition vs the first, above that condition's bars
+    for cond in conditions[1:]:
+        p = tests[tests["condition_b"] == cond].set_index("construct")["p"].reindex(wells)
+        annotate_significance(ax, x_offsets[cond], tops, p.to_numpy())
+
+
+class LightDarkTemplate:
+    # One light/dark figure (axes, bar containers, error bars, replicate dots,
+    # ticks, legend, layout) built for a wells × conditions layout, then reused
+    # for every column: update() only swaps heights, error bars, dot offsets and
+    # y-limits, so a 100-column batch pays for subplots/ticks/tight_layout once
+
+    def __init__(self, fig, plate, wells, light_dark):
+        # fig: a figure _draw_light_dark built (and laid out) for the first column
+        from matplotlib.collections import PathCollection
+        from matplotlib.container import BarContainer
+
+        self.fig = fig
+        self.plate = plate
+        self.wells = wells
+        self.light_dark = light_dark
+        self.ax = self.fig.axes[0]
+        self.conditions = list(dict.fromkeys(light_dark[p]["condition"] for p in plate.present_conditions()))
+        bars = [c for c in self.ax.containers if isinstance(c, BarContainer)]
+        dots = [c for c in self.ax.collections if isinstance(c, PathCollection)]
+        self.bars = dict(zip(self.conditions, bars))
+        self.dots = dict(zip(self.conditions, dots))
+        self.x_offsets = {cond: np.array([r.get_x() + r.get_width() / 2 for r in bars[i].patches])
+                          for i, cond in enumerate(self.conditions)}
+
+    def update(self, combined, col_name, tests=None):
+        tops = np.full(len(self.wells), -np.inf)
+        bottoms = np.zeros(len(self.wells))
+        for cond in self.conditions:
+            mean, std = _bar_values(combined, cond, self.wells)
+            x = self.x_offsets[cond]
+            container = self.bars[cond]
+            for rect, height in zip(container.patches, mean):
+                rect.set_height(height)
+
+            _, (lower_caps, upper_caps), (err_lines,) = container.errorbar.lines
+            lower_caps.set_ydata(mean - std)
+            upper_caps.set_ydata(mean + std)
+            err_lines.set_segments(np.stack([np.column_stack([x, mean - std]),
+                                             np.column_stack([x, mean + std])], axis=1))
+
+            pos, vals = _dot_values(self.plate, self.light_dark, cond, col_name)
+            offsets = self.dots[cond].get_offsets()
+            offsets[:, 1] = vals
+            self.dots[cond].set_offsets(offsets)
+
+            tops = np.fmax(tops, mean + np.nan_to_num(std))
+            np.fmax.at(tops, pos, vals)
+            bottoms = np.fmin(bottoms, mean - np.nan_to_num(std))
+            np.fmin.at(bottoms, pos, vals)
+
+        # Autoscale by hand (collections are not part of relim)
+        self.ax.set_ylim(_y_limits(bottoms, tops))
+
+        for text in list(self.ax.texts):
+            text.remove()
+        _annotate_light_dark(self.ax, tests, self.conditions, self.x_offsets, tops, self.wells)
+        return self.fig
 
 
 
@@ -196,5 +756,4 @@ if __name__ == "__main__":
     }
 
 
-    for col_name in column_names:
-        generate_light_dark_plot(file, savefile, col_name, y_label, row_names, light_dark)
+    generate_light_dark_plots(file, savefile, column_names, y_label, row_names, light_dark)
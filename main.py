@@ -1,3 +1,5 @@
+import batch_render
+import export
 import light_dark_plotter
 
 row_names = ["ICR58_0", "ICR186_0", "ICR187_0", "ICR186+190_0", "ICR187+190_0", 
@@ -22,5 +24,35 @@ light_dark = {
 }
 
 
-for col_name in column_names:
-    light_dark_plotter.generate_light_dark_plot(file, savefile, col_name, y_label, row_names, light_dark)
+# True for unattended runs: Agg backend, no windows, one worker per core
+headless = False
+
+# True: every column as a page of one multi-page PDF report instead of a file per column
+report = False
+
+# Large construct panels: split constructs into small-multiple panels drawn in parallel
+# and tiled into one PDF per column. None = off; True = runs of 12 constructs;
+# "family" (name before "_"), "row" (plate row) or a {construct: group} dict
+facets = None
+
+# Output formats for this run (pdf, svg, png, svgz); None = the profile's (pdf + svg by default), ["png"] for quick looks
+formats = None
+
+# "compact": pdf + svgz, text-as-text SVG, subset fonts, very dense scatters rasterized,
+# file sizes printed (see export.PROFILES)
+profile = "default"
+
+# e.g. "plots/trace.json": per-stage timing/memory trace + summary table (headless runs)
+trace = None
+
+if __name__ == "__main__":
+    export.set_profile(profile)
+    if report:
+        light_dark_plotter.generate_light_dark_report(file, savefile, column_names, y_label, row_names, light_dark, incremental=True)
+    elif facets is not None:
+        light_dark_plotter.generate_light_dark_facets(file, savefile, column_names, y_label, row_names, light_dark,
+                                                      group_by=None if facets is True else facets)
+    elif headless:
+        batch_render.run_batch(batch_render.light_dark_jobs(file, savefile, column_names, y_label, row_names, light_dark, incremental=True, formats=formats), trace=trace)
+    else:
+        light_dark_plotter.generate_light_dark_plots(file, savefile, column_names, y_label, row_names, light_dark, incremental=True, formats=formats)
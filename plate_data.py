@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+
+class PlateData:
+    # One plate (or a multi-plate export) as flat NumPy arrays instead of a
+    # DataFrame: values is wells × columns, condition / construct / replicate are
+    # integer codes into the conditions / constructs label lists. Rows are kept
+    # sorted by (condition, construct), so a condition is one contiguous run of
+    # rows (slices are views) and per-group reductions are np.add.reduceat calls.
+    __slots__ = ("wells", "columns", "values", "condition", "construct", "replicate",
+                 "conditions", "constructs", "_starts", "_index")
+
+    def __init__(self, wells, columns, values, condition, construct, conditions, constructs, replicate=None):
+        condition = np.asarray(condition, dtype=np.intp)
+        construct = np.asarray(construct, dtype=np.intp)
+        # Stable, so replicates keep their plate order within a group
+        order = np.lexsort((construct, condition))
+
+        self.wells = np.asarray(wells)[order]
+        self.columns = list(columns)
+        self.values = np.ascontiguousarray(np.asarray(values)[order])
+        self.condition = condition[order]
+        self.construct = construct[order]
+        self.conditions = list(conditions)
+        self.constructs = list(constructs)
+
+        n = len(order)
+        key = self.condition * len(self.constructs) + self.construct
+        self._starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if n else np.zeros(0, dtype=np.intp)
+        if replicate is None:
+            # Position within the group, like groupby().cumcount()
+            replicate = np.arange(n) - np.repeat(self._starts, self.group_sizes())
+        else:
+            replicate = np.asarray(replicate, dtype=np.intp)[order]
+        self.replicate = replicate
+        self._index = {c: j for j, c in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df, columns, construct, condition=None, replicate=None, well="Well"):
+        # condition / construct / replicate: column names. Categorical columns
+        # keep their category order (unused categories included), others are
+        # numbered in order of first appearance. No condition -> a single one.
+        def codes(col):
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                return values.cat.codes.to_numpy(), list(values.cat.categories)
+            c, labels = pd.factorize(values, sort=False)
+            return c, list(labels)
+
+        construct_codes, constructs = codes(construct)
+        if condition is None:
+            condition_codes, conditions = np.zeros(len(df), dtype=np.intp), [None]
+        else:
+            condition_codes, conditions = codes(condition)
+        return cls(
+            df[well].astype(str).to_numpy(), columns, df[list(columns)].to_numpy(),
+            condition_codes, construct_codes, conditions, constructs,
+            None if replicate is None else df[replicate].to_numpy(),
+        )
+
+    def __len__(self):
+        return len(self.condition)
+
+    def group_sizes(self):
+        return np.diff(np.r_[self._starts, len(self)])
+
+    def groups(self):
+        # (condition code, construct code) of every group, in row order
+        return self.condition[self._starts], self.construct[self._starts]
+
+    def present_conditions(self):
+        # Condition labels that have wells, in label order
+        return [self.conditions[c] for c in np.unique(self.condition)]
+
+    def rows(self, condition):
+        # The contiguous rows of one condition (label) as a slice
+        code = self.conditions.index(condition)
+        lo, hi = np.searchsorted(self.condition, [code, code + 1])
+        return slice(lo, hi)
+
+    def column(self, name, rows=slice(None)):
+        # A view, no copy
+        return self.values[rows, self._index[name]]
+
+    def group_stats(self):
+        # mean / std (ddof=1) / n of every group × column, NaNs skipped, in float64
+        ok = ~np.isnan(self.values)
+        n = np.add.reduceat(ok, self._starts, axis=0)
+        total = np.add.reduceat(np.where(ok, self.values, 0), self._starts, axis=0, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / n
+            dev = np.where(ok, self.values - np.repeat(mean, self.group_sizes(), axis=0), 0)
+            std = np.sqrt(np.add.reduceat(dev * dev, self._starts, axis=0) / (n - 1))
+        return mean, std, n
+
+    def subset(self, constructs, columns=None):
+        # Only these constructs (labels, renumbered in the given order) and columns
+        columns = self.columns if columns is None else list(columns)
+        remap = np.full(len(self.constructs), -1)
+        remap[pd.Index(self.constructs).get_indexer(constructs)] = np.arange(len(constructs))
+        new = remap[self.construct]
+        keep = new >= 0
+        return PlateData(
+            self.wells[keep], columns, self.values[np.ix_(keep, [self._index[c] for c in columns])],
+            self.condition[keep], new[keep], self.conditions, constructs, self.replicate[keep],
+        )
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Layout file: one row per well. Well is required; replicate is numbered within
+# every other column (condition, construct, npn_mM, washes, ...) when missing, so
+# the same replicate lines up across concentrations / washes; extra columns are kept.
+# Wells with an empty condition or construct (blanks) are left out of the layout.
+LAYOUT_COLUMNS = ["condition", "construct", "replicate", "npn_mM"]
+
+# abs path -> (mtime_ns, layout)
+_layouts = {}
+
+
+def normalize_wells(wells):
+    # "A1.fcs " -> "A1", same cleaning washes_comparison does
+    return pd.Series(wells, dtype="string").str.replace(r"\.fcs$", "", regex=True).str.strip()
+
+
+def _index_layout(layout):
+    layout = layout.copy()
+    layout["Well"] = normalize_wells(layout["Well"]).to_numpy()
+    if layout["Well"].duplicated().any():
+        dupes = layout.loc[layout["Well"].duplicated(), "Well"].tolist()
+        raise ValueError(f"Plate layout lists wells more than once: {dupes[:5]}")
+
+    # Blank wells: unlabelled, so not part of any group (and not numbered)
+    labels = [c for c in ("condition", "construct") if c in layout]
+    blank = pd.Series(False, index=layout.index)
+    for col in labels:
+        blank |= layout[col].isna() | (layout[col].astype("string").str.strip() == "")
+    layout = layout[~blank.to_numpy()]
+
+    if "replicate" not in layout:
+        keys = list(layout.columns.drop("Well"))
+        layout["replicate"] = layout.groupby(keys, sort=False, dropna=False).cumcount() if keys else 0
+
+    # Categories in first-appearance order = plotting order
+    for col in layout.columns.drop(["Well", "replicate"], errors="ignore"):
+        if layout[col].dtype == object or pd.api.types.is_string_dtype(layout[col]):
+            layout[col] = pd.Categorical(layout[col], categories=pd.unique(layout[col].dropna()))
+    layout["replicate"] = layout["replicate"].astype(np.int16)
+
+    return layout.set_index("Well")
+
+
+def load_plate_layout(layout):
+    # Accepts a layout CSV path or an already-built frame; files are parsed once per process
+    if isinstance(layout, pd.DataFrame):
+        return layout if layout.index.name == "Well" else _index_layout(layout)
+
+    abs_path = os.path.abspath(layout)
+    mtime = os.stat(abs_path).st_mtime_ns
+    hit = _layouts.get(abs_path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+
+    indexed = _index_layout(pd.read_csv(abs_path))
+    _layouts[abs_path] = (mtime, indexed)
+    return indexed
+
+
+def join_layout(df, layout, well_col="Well"):
+    # Attach the layout's columns to each row of a cleaned table; wells that
+    # are not in the layout (blanks, Mean/SD rows) are dropped
+    layout = load_plate_layout(layout)
+    pos = layout.index.get_indexer(normalize_wells(df[well_col]))
+    keep = pos >= 0
+    out = df[keep].copy()
+    for col in layout.columns:
+        # .array keeps the categorical dtype (codes only, no string copies)
+        out[col] = layout[col].iloc[pos[keep]].array
+    return out
+
+
+def light_dark_layout(wells, row_names, light_dark, n_reps=3):
+    # Layout equivalent to light_dark_plotter's positional rules (2-char prefix
+    # -> condition, every n_reps rows -> construct), to seed a layout file
+    wells = pd.Series(wells, dtype="string")
+    wells = wells[~wells.isin(["Mean", "SD"])]
+    prefix = wells.str[:2]
+    rows = []
+    for p, meta in light_dark.items():
+        for i, well in enumerate(wells[prefix == p]):
+            rows.append({
+                "Well": well,
+                "condition": meta["condition"],
+                "construct": row_names[i // n_reps],
+                "replicate": i % n_reps,
+            })
+    return _index_layout(pd.DataFrame(rows))
+
+
+def save_plate_layout(layout, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    load_plate_layout(layout).reset_index().to_csv(path, index=False)
@@ -0,0 +1,158 @@
+import itertools
+import math
+
+import numpy as np
+
+N_BOOT = 2000
+N_PERM = 10000
+SEED = 0
+LEVEL = 0.95
+# Significance level the permutation test must be able to reach; below that
+# resolution (3 vs 3 replicates: 20 splits, smallest p = 0.1) Welch's t is used
+ALPHA = 0.05
+
+# Upper bound on elements in one resampled block (tests × resamples × replicates),
+# so thousands of tests never materialize one huge array
+CHUNK = 1 << 22
+
+
+def _compact(values, n):
+    # NaN-padded rows that each hold exactly n values -> dense (rows, n)
+    order = np.argsort(np.isnan(values), axis=1, kind="stable")
+    return np.take_along_axis(values, order, axis=1)[:, :n]
+
+
+def _chunks(n_tests, per_test):
+    step = max(1, CHUNK // max(per_test, 1))
+    for start in range(0, n_tests, step):
+        yield slice(start, start + step)
+
+
+def _bootstrap_ci(a, b, n_boot, rng, level):
+    # One (n_boot, n) index matrix per group, shared by every test in the block
+    ia = rng.integers(0, a.shape[1], size=(n_boot, a.shape[1]))
+    ib = rng.integers(0, b.shape[1], size=(n_boot, b.shape[1]))
+    diffs = np.empty((len(a), n_boot))
+    for s in _chunks(len(a), n_boot * (a.shape[1] + b.shape[1])):
+        diffs[s] = b[s][:, ib].mean(axis=-1) - a[s][:, ia].mean(axis=-1)
+    tail = (1 - level) / 2 * 100
+    return np.percentile(diffs, [tail, 100 - tail], axis=1)
+
+
+def _permutation_p(a, b, n_perm, rng):
+    # Two-sided p-value for the difference in means. Small groups (3 vs 3 = 20
+    # splits) are enumerated exactly; otherwise n_perm random relabelings.
+    pooled = np.concatenate([a, b], axis=1)
+    n, na = pooled.shape[1], a.shape[1]
+    exact = math.comb(n, na) <= n_perm
+    if exact:
+        idx = np.array([list(c) + [j for j in range(n) if j not in c]
+                        for c in itertools.combinations(range(n), na)])
+    else:
+        idx = np.argsort(rng.random((n_perm, n)), axis=1)
+
+    observed = np.abs(b.mean(axis=1) - a.mean(axis=1))
+    count = np.zeros(len(a))
+    for s in _chunks(len(a), len(idx) * n):
+        perm = pooled[s][:, idx]
+        stat = np.abs(perm[..., na:].mean(axis=-1) - perm[..., :na].mean(axis=-1))
+        # Relative tolerance so ties with the observed split count as "as extreme"
+        count[s] = (stat >= observed[s, None] * (1 - 1e-12)).sum(axis=1)
+    return count / len(idx) if exact else (count + 1) / (n_perm + 1)
+
+
+def _min_permutation_p(na, nb, n_perm):
+    # Smallest p-value _permutation_p can return for these group sizes. Exactly
+    # enumerated equal-sized groups always count the observed split's mirror too.
+    splits = math.comb(na + nb, na)
+    if splits <= n_perm:
+        return (2 if na == nb else 1) / splits
+    return 1 / (n_perm + 1)
+
+
+def _welch_p(a, b):
+    # Two-sided Welch t-test p-value per row of dense (rows, n) groups
+    from scipy.stats import t as student_t
+
+    va = a.var(axis=1, ddof=1) / a.shape[1]
+    vb = b.var(axis=1, ddof=1) / b.shape[1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (b.mean(axis=1) - a.mean(axis=1)) / np.sqrt(va + vb)
+        df = (va + vb) ** 2 / (va ** 2 / (a.shape[1] - 1) + vb ** 2 / (b.shape[1] - 1))
+    return 2 * student_t.sf(np.abs(t), df)
+
+
+def compare_groups(a, b, n_boot=N_BOOT, n_perm=N_PERM, seed=SEED, level=LEVEL, alpha=ALPHA):
+    # a, b: (tests, replicates) NaN-padded values of the two groups of every test.
+    # Returns per-test arrays: means, diff (b - a), bootstrap CI of the diff,
+    # p-value and the test behind it ("method"). p is a permutation p-value when
+    # the permutation test can go below alpha for that sample size, else Welch's
+    # t-test. Tests are batched by sample size; tests with fewer than 2 values
+    # in a group get NaN.
+    a = np.atleast_2d(np.asarray(a, dtype=np.float64))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float64))
+    n_a = (~np.isnan(a)).sum(axis=1)
+    n_b = (~np.isnan(b)).sum(axis=1)
+
+    out = {"n_a": n_a, "n_b": n_b}
+    for key in ("mean_a", "mean_b", "diff", "ci_low", "ci_high", "p"):
+        out[key] = np.full(len(a), np.nan)
+    out["method"] = np.full(len(a), None, dtype=object)
+
+    rng = np.random.default_rng(seed)
+    for sa, sb in sorted(set(zip(n_a.tolist(), n_b.tolist()))):
+        if sa < 2 or sb < 2:
+            continue
+        rows = np.flatnonzero((n_a == sa) & (n_b == sb))
+        ga, gb = _compact(a[rows], sa), _compact(b[rows], sb)
+        out["mean_a"][rows] = ga.mean(axis=1)
+        out["mean_b"][rows] = gb.mean(axis=1)
+        out["diff"][rows] = out["mean_b"][rows] - out["mean_a"][rows]
+        out["ci_low"][rows], out["ci_high"][rows] = _bootstrap_ci(ga, gb, n_boot, rng, level)
+        if _min_permutation_p(sa, sb, n_perm) <= alpha:
+            out["p"][rows] = _permutation_p(ga, gb, n_perm, rng)
+            out["method"][rows] = "permutation"
+        else:
+            out["p"][rows] = _welch_p(ga, gb)
+            out["method"][rows] = "welch"
+    return out
+
+
+def fdr_bh(p):
+    # Benjamini-Hochberg adjusted p-values (q-values); NaNs stay NaN
+    p = np.asarray(p, dtype=np.float64)
+    q = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    pv = p[ok]
+    order = np.argsort(pv)
+    ranked = pv[order] * len(pv) / np.arange(1, len(pv) + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    adjusted = np.empty_like(pv)
+    adjusted[order] = np.minimum(ranked, 1)
+    q[ok] = adjusted
+    return q
+
+
+def significance_label(p):
+    if np.isnan(p):
+        return ""
+    if p < 0.001:
+        return "***"
+    if p < 0.01:
+        return "**"
+    if p < 0.05:
+        return "*"
+    return "ns"
+
+
+def annotate_significance(ax, xs, tops, p_values):
+    # Stars (or "ns") just above each bar / error bar / dot; the y-range grows to fit them
+    bottom, top_lim = ax.get_ylim()
+    span = top_lim - bottom
+    highest = top_lim
+    for x, top, p in zip(xs, tops, p_values):
+        label = significance_label(p)
+        if label and np.isfinite(top):
+            ax.text(x, top + 0.02 * span, label, ha="center", va="bottom", fontsize=10)
+            highest = max(highest, top + 0.12 * span)
+    ax.set_ylim(bottom, highest)
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+import basic_plotter
+import light_dark_plotter
+from flowjo_io import iter_flowjo_tables, load_flowjo_table
+
+
+def write_summary(summary, out_path):
+    # Output format follows the extension: .csv, .parquet or .json
+    ext = os.path.splitext(out_path)[1].lower()
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    if ext == ".csv":
+        summary.to_csv(out_path, index=False)
+    elif ext == ".parquet":
+        summary.to_parquet(out_path, index=False)
+    elif ext == ".json":
+        summary.to_json(out_path, orient="records", indent=1)
+    else:
+        raise ValueError(f"Unsupported summary format: {ext!r} (use .csv, .parquet or .json)")
+
+
+def summarize_table(file_path, kind, row_names, column_names=None, light_dark=None):
+    # No columns given -> every statistic column in the table
+    if not column_names:
+        column_names = list(load_flowjo_table(file_path).columns[1:])
+
+    if kind == "light-dark":
+        return light_dark_plotter.summarize_light_dark(file_path, column_names, row_names, light_dark)
+    if kind == "wash":
+        return basic_plotter.summarize_wash_bar(file_path, column_names, row_names)
+    raise ValueError(f"Unknown summary kind: {kind!r}")
+
+
+def summarize_tables(paths, kind, row_names, column_names=None, light_dark=None, max_workers=None):
+    # Many tables (list, directory or glob) parsed concurrently; each is summarized
+    # as soon as it has loaded, from the in-process cache the loader filled.
+    # Rows are tagged with their file and come out in file order.
+    summaries = {}
+    for path, _ in iter_flowjo_tables(paths, columns=column_names or None, max_workers=max_workers):
+        summary = summarize_table(path, kind, row_names, column_names, light_dark)
+        summary.insert(0, "file", os.path.basename(path))
+        summaries[path] = summary
+    return pd.concat([summaries[p] for p in sorted(summaries)], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mean/SD summary tables from a FlowJo table, no plotting.")
+    parser.add_argument("file", help="FlowJo table CSV, or a directory / glob of them")
+    parser.add_argument("config", help="JSON run config with row_names, light_dark and optionally column_names")
+    parser.add_argument("-k", "--kind", choices=["light-dark", "wash"], default="light-dark")
+    parser.add_argument("-o", "--out", help="output .csv/.parquet/.json (prints to stdout if omitted)")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if os.path.isfile(args.file):
+        summary = summarize_table(
+            args.file, args.kind, config["row_names"],
+            column_names=config.get("column_names"), light_dark=config.get("light_dark"),
+        )
+    else:
+        summary = summarize_tables(
+            args.file, args.kind, config["row_names"],
+            column_names=config.get("column_names"), light_dark=config.get("light_dark"),
+        )
+
+    if args.out:
+        write_summary(summary, args.out)
+    else:
+        print(summary.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
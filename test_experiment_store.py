@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+import experiment_store
+import flowjo_io
+
+COLUMN = "cells/Single Cells | Geometric Mean (FL1-A :: 355nm405-30-A)"
+LIGHT_DARK = {
+    "01": {"condition": "Light", "color": "#d86ecc"},
+    "02": {"condition": "Dark", "color": "#bfbfbf"},
+}
+ROW_NAMES = [f"ICR{i}" for i in range(100)]
+
+
+def _write_table(path, n_wells):
+    # n_wells per prefix, plate order, plus FlowJo's Mean/SD footer
+    wells = [f"{p}-{chr(65 + i // 24)}{i % 24 + 1}.fcs" for p in ("01", "02") for i in range(n_wells // 2)]
+    values = np.arange(len(wells), dtype=np.float64)
+    pd.DataFrame({"": wells + ["Mean", "SD"], COLUMN: np.r_[values, 0, 0]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_query_across_plate_sizes(tmp_path):
+    # A 24-well and a 384-well plate: label dictionaries of different sizes
+    store = str(tmp_path / "store")
+    flowjo_io.clear_cache()
+    small = _write_table(tmp_path / "06-Nov-2025 FlowJo table.csv", 24)
+    large = _write_table(tmp_path / "07-Nov-2025 FlowJo table.csv", 384)
+    experiment_store.ingest_light_dark(small, ROW_NAMES, LIGHT_DARK, [COLUMN], store=store)
+    experiment_store.ingest_light_dark(large, ROW_NAMES, LIGHT_DARK, [COLUMN], store=store)
+
+    rows = experiment_store.query(store=store)
+    assert rows.groupby("date", observed=True).size().to_dict() == {"2025-11-06": 24, "2025-11-07": 384}
+
+    summary = experiment_store.summarize_across(by=["date", "condition"], store=store)
+    assert summary["n"].sum() == 24 + 384
+    assert set(summary["condition"]) == {"Light", "Dark"}
+
+    # Filters still apply across both files
+    icr0 = experiment_store.query(constructs="ICR0", conditions="Light", store=store)
+    assert set(icr0["date"]) == {"2025-11-06", "2025-11-07"}
+    assert len(icr0) == 6
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import flowjo_io
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TABLE = """,a | Mean,b | Mean,note
+A1.fcs,1.5,10,x
+A2.fcs,2.5,20,
+Mean,2.0,15,
+SD,0.7,7,
+"""
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text(TABLE)
+    flowjo_io.clear_cache()
+    yield str(path)
+    flowjo_io.clear_cache()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # Columns parsed from the CSV (rather than read from the sidecar), per call
+    calls = []
+    parse = flowjo_io._parse_columns
+
+    def counting(file_path, header, raw_header, columns, *args, **kwargs):
+        calls.append(list(columns))
+        return parse(file_path, header, raw_header, columns, *args, **kwargs)
+
+    monkeypatch.setattr(flowjo_io, "_parse_columns", counting)
+    return calls
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_sidecar_reused_across_runs(table, parses):
+    first = flowjo_io.load_flowjo_table(table)
+    flowjo_io.clear_cache()
+    second = flowjo_io.load_flowjo_table(table)
+    assert len(parses) == 1
+    assert first.equals(second)
+
+
+def test_mtime_change_same_content_keeps_sidecar(table, parses):
+    flowjo_io.load_flowjo_table(table)
+    _bump_mtime(table)
+    flowjo_io.clear_cache()
+    flowjo_io.load_flowjo_table(table)
+    assert len(parses) == 1
+    # The new mtime is recorded, so the next run skips the content hash
+    meta = flowjo_io._read_meta(flowjo_io._sidecar_dir(table))
+    assert meta["mtime_ns"] == os.stat(table).st_mtime_ns
+
+
+def test_content_change_reparses(table, parses):
+    assert flowjo_io.load_flowjo_table(table)["a | Mean"].iloc[0] == 1.5
+    # Same size, different bytes
+    with open(table, "w") as f:
+        f.write(TABLE.replace("1.5", "7.5"))
+    _bump_mtime(table)
+    flowjo_io.clear_cache()
+    assert flowjo_io.load_flowjo_table(table)["a | Mean"].iloc[0] == 7.5
+    assert len(parses) == 2
+
+
+def test_text_column_nan_round_trip(table):
+    parsed = flowjo_io.load_flowjo_table(table)
+    flowjo_io.clear_cache()
+    reloaded = flowjo_io.load_flowjo_table(table)
+    assert parsed["note"].isna().tolist() == [False, True, True, True]
+    assert reloaded["note"].isna().tolist() == [False, True, True, True]
+    assert reloaded["note"].iloc[0] == "x"
+
+
+def _load_in_subprocess(path, column):
+    code = f"import flowjo_io; flowjo_io.load_flowjo_table({path!r}, columns=[{column!r}])"
+    subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True)
+
+
+def test_partial_columns_fill_across_processes(table, parses):
+    # Each process parses one column; the sidecar ends up with both
+    _load_in_subprocess(table, "a | Mean")
+    _load_in_subprocess(table, "b | Mean")
+    meta = flowjo_io._read_meta(flowjo_io._sidecar_dir(table))
+    assert {"Unnamed: 0", "a | Mean", "b | Mean"} <= set(meta["files"])
+
+    df = flowjo_io.load_flowjo_table(table, columns=["a | Mean", "b | Mean"])
+    assert parses == []
+    assert df["a | Mean"].tolist() == [1.5, 2.5, 2.0, 0.7]
+    assert df["b | Mean"].tolist() == [10, 20, 15, 7]
+
+
+def test_duplicate_header_names(tmp_path):
+    path = tmp_path / "dup.csv"
+    path.write_text(",a,b,a\nA1.fcs,1,10,100\nA2.fcs,2,20,200\n")
+    flowjo_io.clear_cache()
+    assert flowjo_io.load_flowjo_table(str(path))["a.1"].tolist() == [100, 200]
+    assert flowjo_io.load_flowjo_table(str(path), columns=["a.1"], use_cache=False)["a.1"].tolist() == [100, 200]
+    flowjo_io.clear_cache()
+    assert np.array_equal(flowjo_io.load_flowjo_table(str(path), columns=["a"])["a"], [1, 2])
+
+
+def test_utf8_bom_header(tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes(b"\xef\xbb\xbf" + TABLE.encode())
+    flowjo_io.clear_cache()
+    assert flowjo_io.load_flowjo_table(str(path), columns=["a | Mean"])["a | Mean"].tolist() == [1.5, 2.5, 2.0, 0.7]
+    assert flowjo_io.load_flowjo_table(str(path), columns=["b | Mean"], use_cache=False)["b | Mean"].tolist() == [10, 20, 15, 7]
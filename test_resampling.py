@@ -0,0 +1,96 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from resampling import _bootstrap_ci, _min_permutation_p, _permutation_p, compare_groups, fdr_bh
+
+
+def _brute_force_p(a, b):
+    # Every relabeling of the pooled values, counted one by one
+    pooled = np.concatenate([a, b])
+    observed = abs(b.mean() - a.mean())
+    splits = list(itertools.combinations(range(len(pooled)), len(a)))
+    extreme = 0
+    for split in splits:
+        mask = np.zeros(len(pooled), dtype=bool)
+        mask[list(split)] = True
+        stat = abs(pooled[~mask].mean() - pooled[mask].mean())
+        extreme += stat >= observed * (1 - 1e-12)
+    return extreme / len(splits)
+
+
+def test_exact_permutation_matches_brute_force():
+    rng = np.random.default_rng(3)
+    a = rng.normal(size=(5, 4))
+    b = rng.normal(size=(5, 4)) + np.arange(5)[:, None]
+    p = _permutation_p(a, b, n_perm=10000, rng=rng)
+    assert p == pytest.approx([_brute_force_p(x, y) for x, y in zip(a, b)])
+
+
+def test_exact_permutation_floor_for_three_replicates():
+    # 3 vs 3: 20 splits, the observed one and its mirror -> p can't go below 0.1
+    p = _permutation_p(np.array([[1, 1.1, 0.9]]), np.array([[100, 101, 99]]), n_perm=10000, rng=None)
+    assert p == pytest.approx([0.1])
+    assert _min_permutation_p(3, 3, 10000) == pytest.approx(0.1)
+    assert _min_permutation_p(3, 4, 10000) == pytest.approx(1 / 35)
+    assert _min_permutation_p(20, 20, 999) == pytest.approx(1 / 1000)
+
+
+def test_three_replicates_fall_back_to_welch():
+    from scipy.stats import ttest_ind
+
+    a, b = [1, 1.1, 0.9], [100, 101, 99]
+    res = compare_groups([a], [b])
+    assert res["method"][0] == "welch"
+    assert res["p"][0] == pytest.approx(ttest_ind(b, a, equal_var=False).pvalue)
+    assert res["p"][0] < 0.05
+
+
+def test_larger_groups_use_permutation():
+    rng = np.random.default_rng(4)
+    a, b = rng.normal(size=(2, 5)), rng.normal(size=(2, 5))
+    res = compare_groups(a, b)
+    assert list(res["method"]) == ["permutation", "permutation"]
+    assert res["p"] == pytest.approx([_brute_force_p(x, y) for x, y in zip(a, b)])
+
+
+def test_too_few_replicates_give_nan():
+    res = compare_groups([[1.0, np.nan, np.nan]], [[2.0, 3.0, 4.0]])
+    assert np.isnan(res["p"][0]) and res["method"][0] is None
+
+
+def test_bootstrap_ci_percentiles():
+    a = np.array([[1.0, 2.0, 3.0, 4.0]])
+    b = np.array([[2.0, 4.0, 6.0]])
+    low, high = _bootstrap_ci(a, b, 500, np.random.default_rng(7), 0.9)
+
+    # Same draws, one resample at a time
+    rng = np.random.default_rng(7)
+    ia = rng.integers(0, 4, size=(500, 4))
+    ib = rng.integers(0, 3, size=(500, 3))
+    diffs = b[0][ib].mean(axis=1) - a[0][ia].mean(axis=1)
+    assert low[0] == pytest.approx(np.percentile(diffs, 5))
+    assert high[0] == pytest.approx(np.percentile(diffs, 95))
+
+
+def test_bootstrap_ci_of_constant_groups_is_the_difference():
+    low, high = _bootstrap_ci(np.full((2, 3), 1.0), np.full((2, 3), 4.0), 100, np.random.default_rng(0), 0.95)
+    assert low == pytest.approx([3, 3]) and high == pytest.approx([3, 3])
+
+
+def test_fdr_bh_known_values():
+    q = fdr_bh([0.01, 0.04, 0.03, 0.005, np.nan])
+    assert q[:4] == pytest.approx([0.02, 0.04, 0.04, 0.02])
+    assert np.isnan(q[4])
+
+
+def test_fdr_bh_keeps_p_ordering():
+    p = np.random.default_rng(5).uniform(size=50) ** 3
+    q = fdr_bh(p)
+    order = np.argsort(p)
+    assert np.all(np.diff(q[order]) >= 0)
+    assert np.all(q >= p) and np.all(q <= 1)
+    # Input order doesn't change the adjusted values
+    shuffled = np.random.default_rng(6).permutation(50)
+    assert fdr_bh(p[shuffled]) == pytest.approx(q[shuffled])
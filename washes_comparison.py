@@ -1,151 +1,213 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+from export import export_figure, output_paths
+from flowjo_io import load_flowjo_table
+from instrumentation import figure, stage
+from plate_layout import join_layout
+from resampling import annotate_significance, compare_groups, fdr_bh
+
 NUM_REPS = 3
 
-def generate_wash_bar_plot(col_name):
-    # Column name for fluorescence values
-    value_col = f"cells/Single Cells | {col_name} (FL2-H :: 355nm450-45-H)"
-
-    df = pd.read_csv("14-10-flowjo-data.csv")
-
-    df = df.rename(columns={df.columns[0]: 'Well'})
-    df = df[:-2]
-
-    first_col = df.columns[0]
-    df = df.rename(columns={first_col: 'WellRaw'})
-    df['Well'] = df['WellRaw'].astype(str).str.replace(r'\.fcs$', '', regex=True).str.strip()
-
-    # icr_66 is empty vector, icr_58 is OMP
-    icr_66_0  = df.loc[df['Well'].str[0].eq('A')].copy()
-    icr_66_10 = df.loc[df['Well'].str[0].eq('C')].copy()
-    icr_58_0  = df.loc[df['Well'].str[0].eq('B')].copy()
-    icr_58_10 = df.loc[df['Well'].str[0].eq('D')].copy()
-
-    for d in [icr_66_0, icr_66_10, icr_58_0, icr_58_10]:
-        d['Col'] = d['Well'].str.extract(r'(\d+)$').astype(int)
-        d['Washes'] = ((d['Col'] - 1) // NUM_REPS) 
-
-
-    def summarize_groups(df, value_col=f"cells/Single Cells | {col_name} (FL2-H :: 355nm450-45-H)"):
-        summary = df.groupby('Washes')[value_col].agg(['mean', 'std']).reset_index()
-        return summary
-
-    sum_66_0  = summarize_groups(icr_66_0)
-    sum_66_10 = summarize_groups(icr_66_10)
-    sum_58_0  = summarize_groups(icr_58_0)
-    sum_58_10 = summarize_groups(icr_58_10)
-
-    df_58_diff = sum_58_10[["Washes"]].copy()
-    df_58_diff['mean_diff'] = sum_58_10["mean"] - sum_58_0["mean"]
-    df_58_diff['std_combined'] = (sum_58_10['std']**2 + sum_58_0['std']**2)**0.5
-
-    df_66_diff = sum_66_10[["Washes"]].copy()
-    df_66_diff['mean_diff'] = sum_66_10["mean"] - sum_66_0["mean"]
-    df_66_diff['std_combined'] = (sum_66_10['std']**2 + sum_66_0['std']**2)**0.5
-        
-
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.sans-serif": ["Arial"],  
-        "font.size": 10,                   
-        "axes.labelsize": 12,
-        "axes.titlesize": 12,
-        "xtick.labelsize": 10,
-        "ytick.labelsize": 10,
-        "legend.fontsize": 9,
-    })
-
-    # Positions and bar width
-    x = np.arange(len(df_66_diff["Washes"]))
-    width = 0.35
-
-    # Create figure
-    fig, ax = plt.subplots(figsize=(8, 5))
-
-    bars1 = ax.bar(
-        x - width/2, df_66_diff["mean_diff"],
-        yerr=[df_66_diff["std_combined"]],
-        width=width, label="Empty Vector",
-        color="#BFBFBF", edgecolor="black",
-        alpha=0.6, capsize=5, linewidth=0.5, 
-        error_kw=dict(elinewidth=0.8, capthick=0.8)
-    )
-    bars2 = ax.bar(
-        x + width/2, df_58_diff["mean_diff"],
-        yerr=df_58_diff["std_combined"],
-        width=width, label="OMP",
-        color="#d86ecc", edgecolor="black",
-        alpha=0.6, capsize=5, linewidth=0.5, 
-        error_kw=dict(elinewidth=0.8, capthick=0.8)
-    )
-
-
-    # Overlay individual data points
-    jitter = 0.07   # horizontal spread for visibility
-    dot_size = 25   # point size
-    dot_alpha = 1 # transparency
-
-    for i, wash in enumerate(df_66_diff["Washes"]):
-
-        # === Empty Vector (icr_66): difference (10 mM - 0 mM) ===
-        vals_0mM = icr_66_0.loc[icr_66_0["Washes"] == wash, value_col].values
-        vals_10mM = icr_66_10.loc[icr_66_10["Washes"] == wash, value_col].values
-        diffs_66 = vals_10mM - vals_0mM
-
-        # Scatter (Empty Vector, gray)
-        ax.scatter(
-            np.repeat(i - width/2, len(diffs_66)) +
-            np.random.uniform(-jitter, jitter, len(diffs_66)),
-            diffs_66,
-            color="#BFBFBF", s=dot_size, alpha=dot_alpha, zorder=1
-        )
-
-        # === OMP (icr_58): difference (10 mM - 0 mM) ===
-        vals_0mM = icr_58_0.loc[icr_58_0["Washes"] == wash, value_col].values
-        vals_10mM = icr_58_10.loc[icr_58_10["Washes"] == wash, value_col].values
-        diffs_58 = vals_10mM - vals_0mM
-
-        # Scatter (OMP, pink)
-        ax.scatter(
-            np.repeat(i + width/2, len(diffs_58)) +
-            np.random.uniform(-jitter, jitter, len(diffs_58)),
-            diffs_58,
-            color="#d86ecc", s=dot_size, alpha=dot_alpha, zorder=1
-        )
-
-    ax.set_xticks(x)
-    ax.set_xticklabels(df_66_diff["Washes"], fontsize=12)
-    ax.set_xlabel("Washes", fontsize=13, labelpad=10)
-    ax.set_ylabel(f"Δ {col_name} Fluorescence Intensity (a.u.)", fontsize=13, labelpad=10)
-    # ax.set_title(f"Difference in {col_name} Fluorescence Intensity by Wash", fontsize=15, pad=15)
-
-    ax.legend(frameon=False, fontsize=12, loc="center left", bbox_to_anchor=(1, 0.5))
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.tick_params(axis="both", which="major", labelsize=11)
-
-    # Add subtle horizontal gridlines
-    ax.yaxis.grid(True, linestyle="-", linewidth=0.8, alpha=0.4)
-    ax.set_axisbelow(True)
-
-    plt.tight_layout()
-    plt.show()
-
-    fig.savefig(
-        f"plots/pdf/16-10-wash-results-{col_name}.pdf",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
-    
-    fig.savefig(
-        f"plots/svg/16-10-wash-results-{col_name}.svg",
-        bbox_inches="tight",   # trims white space
-        dpi=300,               # for raster elements (still vector overall)
-        transparent=True       # if you want transparent background
-    )
+# Plate row letter -> (construct, NPN mM); icr_66 is empty vector, icr_58 is OMP
+ROW_LAYOUT = {
+    "A": ("Empty Vector", 0),
+    "B": ("OMP", 0),
+    "C": ("Empty Vector", 10),
+    "D": ("OMP", 10),
+}
+COLORS = {"Empty Vector": "#BFBFBF", "OMP": "#d86ecc"}
+
+
+def label_wash_wells(df, row_layout=ROW_LAYOUT, num_reps=NUM_REPS, layout=None):
+    # construct / npn_mM / Washes / replicate for every well, either from a plate
+    # layout (needs a washes column) or from row letter + column number
+    if layout is not None:
+        df = join_layout(df, layout)
+        return df.rename(columns={"washes": "Washes"})
+
+    # Only wells in a layout row with a column number; controls like
+    # "Unstained" are ignored
+    df = df[df["Well"].str[0].isin(list(row_layout))]
+    col = df["Well"].str.extract(r"(\d+)$")[0]
+    df = df[col.notna()].copy()
+    row, col = df["Well"].str[0], col[df.index].astype(int)
+
+    constructs = list(dict.fromkeys(c for c, _ in row_layout.values()))
+    df["construct"] = pd.Categorical(row.map({r: c for r, (c, _) in row_layout.items()}), categories=constructs)
+    df["npn_mM"] = row.map({r: n for r, (_, n) in row_layout.items()}).to_numpy()
+    df["Washes"] = ((col - 1) // num_reps).to_numpy()
+    df["replicate"] = ((col - 1) % num_reps).to_numpy()
+    return df
+
+
+def _value_grid(df, value_col):
+    # One (construct × concentration × wash × replicate) array from a single scatter-assignment
+    construct = df["construct"].astype("category")
+    concs = np.sort(df["npn_mM"].unique())
+    washes = np.sort(df["Washes"].unique())
+
+    c_idx = construct.cat.codes.to_numpy()
+    k_idx = np.searchsorted(concs, df["npn_mM"].to_numpy())
+    w_idx = np.searchsorted(washes, df["Washes"].to_numpy())
+    r_idx = df["replicate"].to_numpy().astype(int)
+
+    values = np.full((len(construct.cat.categories), len(concs), len(washes), r_idx.max() + 1), np.nan)
+    values[c_idx, k_idx, w_idx, r_idx] = df[value_col].to_numpy(np.float64)
+    return values, construct, concs, washes
+
+
+def paired_differences(df, value_col):
+    # Every concentration minus the lowest one at once
+    values, construct, concs, washes = _value_grid(df, value_col)
+
+    with np.errstate(invalid="ignore"):
+        means = np.nanmean(values, axis=3)
+        stds = np.nanstd(values, axis=3, ddof=1)
+
+    # [:, 1:] = each higher concentration vs the baseline (lowest) one
+    diffs = values[:, 1:] - values[:, :1]
+    mean_diff = means[:, 1:] - means[:, :1]
+    std_combined = np.sqrt(stds[:, 1:] ** 2 + stds[:, :1] ** 2)
+
+    grid = pd.MultiIndex.from_product(
+        [construct.cat.categories, concs[1:], washes], names=["construct", "npn_mM", "Washes"]
+    ).to_frame(index=False)
+    grid["mean_diff"] = mean_diff.ravel()
+    grid["std_combined"] = std_combined.ravel()
+    return grid, diffs, list(construct.cat.categories), concs, washes
+
+
+def concentration_tests(df, value_col, **kwargs):
+    # Each higher concentration vs the lowest, for every construct × wash in one
+    # batched call: bootstrap CI of the difference + p-value, permutation or
+    # Welch (kwargs: n_boot, n_perm, seed, level, alpha)
+    values, construct, concs, washes = _value_grid(df, value_col)
+    n_c, n_k, n_w, n_r = values.shape
+    a = np.broadcast_to(values[:, :1], (n_c, n_k - 1, n_w, n_r)).reshape(-1, n_r)
+    b = values[:, 1:].reshape(-1, n_r)
+
+    tests = pd.MultiIndex.from_product(
+        [construct.cat.categories, concs[1:], washes], names=["construct", "npn_mM", "Washes"]
+    ).to_frame(index=False)
+    tests["baseline_mM"] = concs[0]
+    for key, col in compare_groups(a, b, **kwargs).items():
+        tests[key] = col
+    tests["q"] = fdr_bh(tests["p"])
+    return tests
+
+
+def generate_wash_bar_plot(col_name, show=True, file_path="14-10-flowjo-data.csv", row_layout=ROW_LAYOUT, layout=None, formats=None, annotate=False):
+    # annotate=True: significance of each 10 mM vs 0 mM difference above its bar
+    import matplotlib.pyplot as plt
+
+    with figure(f"wash-diff-{col_name}"):
+        # Column name for fluorescence values
+        value_col = f"cells/Single Cells | {col_name} (FL2-H :: 355nm450-45-H)"
+
+        with stage("load"):
+            df = load_flowjo_table(file_path, columns=[value_col], compact=True)
+
+        with stage("summarize"):
+            df = df.rename(columns={df.columns[0]: 'Well'})
+            df = df[:-2]
+
+            first_col = df.columns[0]
+            df = df.rename(columns={first_col: 'WellRaw'})
+            df['Well'] = df['WellRaw'].astype(str).str.replace(r'\.fcs$', '', regex=True).str.strip()
+
+            df = label_wash_wells(df, row_layout, NUM_REPS, layout)
+            summary, diffs, constructs, concs, washes = paired_differences(df, value_col)
+
+            # Highest concentration vs the lowest (10 mM - 0 mM)
+            if len(concs) < 2:
+                raise ValueError(f"Need wells at two NPN concentrations to plot differences, found {list(concs)}")
+            k = len(concs) - 2
+            mean_diff = summary["mean_diff"].to_numpy().reshape(diffs.shape[:3])[:, k]
+            std_combined = summary["std_combined"].to_numpy().reshape(diffs.shape[:3])[:, k]
+            diffs = diffs[:, k]
+
+        tests = None
+        if annotate:
+            with stage("tests"):
+                tests = concentration_tests(df, value_col)
+                tests = tests[tests["npn_mM"] == concs[k + 1]]
+
+        with stage("draw"):
+            plt.rcParams.update({
+                "font.family": "sans-serif",
+                "font.sans-serif": ["Arial"],  
+                "font.size": 10,                   
+                "axes.labelsize": 12,
+                "axes.titlesize": 12,
+                "xtick.labelsize": 10,
+                "ytick.labelsize": 10,
+                "legend.fontsize": 9,
+            })
+
+            # Positions and bar width (0.35 per bar for the two-construct plate)
+            x = np.arange(len(washes))
+            width = 0.7 / len(constructs)
+
+            # Create figure
+            fig, ax = plt.subplots(figsize=(8, 5))
+
+            # Overlay individual data points
+            jitter = 0.07   # horizontal spread for visibility
+            dot_size = 25   # point size
+            dot_alpha = 1 # transparency
+
+            for i, construct in enumerate(constructs):
+                color = COLORS.get(construct, f"C{i}")
+                x_offset = x + (i - (len(constructs) - 1) / 2) * width
+
+                ax.bar(
+                    x_offset, mean_diff[i],
+                    yerr=std_combined[i],
+                    width=width, label=construct,
+                    color=color, edgecolor="black",
+                    alpha=0.6, capsize=5, linewidth=0.5, 
+                    error_kw=dict(elinewidth=0.8, capthick=0.8)
+                )
+
+                # Paired replicate differences (10 mM - 0 mM), one scatter per construct
+                xs = np.repeat(x_offset, diffs.shape[2])
+                ys = diffs[i].ravel()
+                ax.scatter(
+                    xs + np.random.uniform(-jitter, jitter, len(xs)),
+                    ys,
+                    color=color, s=dot_size, alpha=dot_alpha, zorder=1
+                )
+
+                if tests is not None:
+                    p = tests[tests["construct"] == construct].set_index("Washes")["p"].reindex(washes)
+                    tops = np.fmax(mean_diff[i] + np.nan_to_num(std_combined[i]), np.nanmax(diffs[i], axis=-1))
+                    annotate_significance(ax, x_offset, tops, p.to_numpy())
+
+            ax.set_xticks(x)
+            ax.set_xticklabels(washes, fontsize=12)
+            ax.set_xlabel("Washes", fontsize=13, labelpad=10)
+            ax.set_ylabel(f"Δ {col_name} Fluorescence Intensity (a.u.)", fontsize=13, labelpad=10)
+            # ax.set_title(f"Difference in {col_name} Fluorescence Intensity by Wash", fontsize=15, pad=15)
+
+            ax.legend(frameon=False, fontsize=12, loc="center left", bbox_to_anchor=(1, 0.5))
+            ax.spines["top"].set_visible(False)
+            ax.spines["right"].set_visible(False)
+            ax.tick_params(axis="both", which="major", labelsize=11)
+
+            # Add subtle horizontal gridlines
+            ax.yaxis.grid(True, linestyle="-", linewidth=0.8, alpha=0.4)
+            ax.set_axisbelow(True)
+
+        with stage("layout"):
+            plt.tight_layout()
+        if show:
+            plt.show()
+
+        export_figure(fig, output_paths(f"16-10-wash-results-{col_name}", formats, subdir=""))
+
+        if not show:
+            plt.close(fig)
 
 
 
@@ -0,0 +1,149 @@
+import argparse
+import datetime
+import fnmatch
+import glob
+import json
+import os
+import time
+
+import matplotlib
+
+import export
+import light_dark_plotter
+from flowjo_io import load_flowjo_table
+
+# Run configs: same JSON as summarize.py (row_names, light_dark, column_names) plus
+#   "pattern":  glob matched against the CSV file name, e.g. "*FlowJo table.csv"
+#   optional "savefile", "y_label", "layout", "formats", "report", "profile"
+CONFIG_DIR = "configs"
+DATA_DIR = "data"
+
+
+def load_configs(config_dir=CONFIG_DIR):
+    configs = []
+    for path in sorted(glob.glob(os.path.join(config_dir, "*.json"))):
+        with open(path) as f:
+            config = json.load(f)
+        if "pattern" not in config:
+            print(f"{path}: no 'pattern', skipped.")
+            continue
+        config["_path"] = path
+        configs.append(config)
+    return configs
+
+
+def match_config(file_path, configs):
+    name = os.path.basename(file_path)
+    return next((c for c in configs if fnmatch.fnmatch(name, c["pattern"])), None)
+
+
+def default_savefile(file_path):
+    # "06-Nov-2025 FlowJo table.csv" -> "06-11-25", else the file stem
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    try:
+        return datetime.datetime.strptime(stem.split(" ")[0], "%d-%b-%Y").strftime("%d-%m-%y")
+    except ValueError:
+        return stem
+
+
+def render(file_path, config):
+    # Incremental: only figures whose data / column / parameters changed are redrawn
+    savefile = config.get("savefile") or default_savefile(file_path)
+    y_label = config.get("y_label", "Geometric Mean")
+    column_names = config.get("column_names")
+    if not column_names:
+        column_names = list(load_flowjo_table(file_path).columns[1:])
+    export.set_profile(config.get("profile", "default"))
+
+    if config.get("report"):
+        light_dark_plotter.generate_light_dark_report(
+            file_path, savefile, column_names, y_label, config["row_names"], config["light_dark"],
+            incremental=True, layout=config.get("layout"),
+        )
+    else:
+        light_dark_plotter.generate_light_dark_plots(
+            file_path, savefile, column_names, y_label, config["row_names"], config["light_dark"],
+            show=False, incremental=True, layout=config.get("layout"), formats=config.get("formats"),
+        )
+
+
+def _snapshot(pattern):
+    # path -> (mtime_ns, size) for every candidate file; exporters' temp/lock files are ignored
+    snap = {}
+    for path in glob.glob(pattern):
+        if os.path.basename(path).startswith((".", "~$")):
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snap[path] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def watch(data_dir=DATA_DIR, config_dir=CONFIG_DIR, interval=0.25, settle=0.5, once=False):
+    # Poll data_dir; a CSV is rendered once its size and mtime have held still for
+    # `settle` seconds (the export has finished). Libraries, parsed tables and
+    # the manifest stay warm in this process between exports.
+    matplotlib.use("Agg", force=True)
+    light_dark_plotter._pyplot()
+
+    done = {}       # path -> (mtime_ns, size) last rendered
+    pending = {}    # path -> ((mtime_ns, size), first seen at that state)
+    config_state = None
+    configs = []
+
+    print(f"Watching {data_dir} (configs in {config_dir}); Ctrl-C to stop.")
+    try:
+        while True:
+            state = _snapshot(os.path.join(config_dir, "*.json"))
+            if state != config_state:
+                # A new or edited config may change any figure: re-check every file
+                config_state, configs = state, load_configs(config_dir)
+                done.clear()
+
+            now = time.monotonic()
+            for path, stat in _snapshot(os.path.join(data_dir, "*.csv")).items():
+                if done.get(path) == stat:
+                    continue
+                if path not in pending or pending[path][0] != stat:
+                    pending[path] = (stat, now)
+                    if not once:
+                        continue
+                elif now - pending[path][1] < settle:
+                    continue
+
+                del pending[path]
+                done[path] = stat
+                config = match_config(path, configs)
+                if config is None:
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    render(path, config)
+                except Exception as e:
+                    print(f"FAILED {path}: {e}")
+                    continue
+                print(f"{os.path.basename(path)} ({os.path.basename(config['_path'])}) done in {time.perf_counter() - start:.2f}s")
+
+            if once:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-render plots whenever a FlowJo export in the data directory changes.")
+    parser.add_argument("--data", default=DATA_DIR, help="directory of FlowJo table CSVs")
+    parser.add_argument("--configs", default=CONFIG_DIR, help="directory of run-config JSON files")
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between polls")
+    parser.add_argument("--settle", type=float, default=0.5, help="seconds a file must be unchanged before rendering")
+    parser.add_argument("--once", action="store_true", help="render what is there now and exit")
+    args = parser.parse_args(argv)
+    watch(args.data, args.configs, args.interval, args.settle, args.once)
+
+
+if __name__ == "__main__":
+    main()